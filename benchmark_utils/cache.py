@@ -0,0 +1,38 @@
+import os
+import hashlib
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+
+def get_cache_dir(*subdirs):
+    """Return a directory to persist data across runs, creating it.
+
+    The cache lives in the ``__cache__`` folder of the benchmark, next to
+    the one used by benchopt, unless ``BENCHMARK_LOGREG_L1_CACHE`` is set.
+    """
+    root = os.environ.get(
+        "BENCHMARK_LOGREG_L1_CACHE",
+        Path(__file__).parents[1] / "__cache__" / "benchmark_utils"
+    )
+    cache_dir = Path(root).joinpath(*subdirs)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def hash_data(*arrays):
+    """Hash the content of dense arrays and scipy sparse matrices."""
+    h = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        if sparse.issparse(a):
+            h.update(f"{a.format}{a.shape}".encode())
+            a = a.tocsr() if a.format not in ('csr', 'csc') else a
+            parts = [a.data, a.indices, a.indptr]
+        else:
+            parts = [np.asarray(a)]
+        for part in parts:
+            h.update(f"{part.dtype}{part.shape}".encode())
+            # ravel(order='K') does not copy C or Fortran contiguous arrays
+            h.update(part.ravel(order='K'))
+    return h.hexdigest()
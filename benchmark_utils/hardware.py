@@ -0,0 +1,62 @@
+import os
+import json
+import time
+import platform
+import importlib.util
+
+from .cache import get_cache_dir
+
+
+# Probing the hardware shells out to nvcc: the result is cached on disk,
+# per machine, and probed again after HARDWARE_CACHE_TTL seconds.
+HARDWARE_CACHE_TTL = 24 * 3600
+
+# Result of the probe in this process, see get_hardware_info.
+_HARDWARE_INFO = None
+
+
+def _probe_hardware():
+    from benchopt.utils.sys_info import get_cuda_version
+    return dict(cuda_version=get_cuda_version())
+
+
+def get_hardware_info():
+    """Return the hardware of this machine, probed at most once per TTL."""
+    global _HARDWARE_INFO
+    if _HARDWARE_INFO is not None:
+        return _HARDWARE_INFO
+
+    # the cache directory can be shared between the nodes of a cluster
+    path = get_cache_dir("hardware") / f"{platform.node()}.json"
+    info = None
+    try:
+        info = json.loads(path.read_text())
+        if time.time() - info['timestamp'] > HARDWARE_CACHE_TTL:
+            info = None
+    except (OSError, ValueError, KeyError):
+        pass
+    if info is None:
+        info = dict(_probe_hardware(), timestamp=time.time())
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(info))
+        os.replace(tmp_path, path)
+
+    _HARDWARE_INFO = info
+    return info
+
+
+def get_cuda_version():
+    """Cached version of ``benchopt.utils.sys_info.get_cuda_version``."""
+    return get_hardware_info()['cuda_version']
+
+
+def check_installed(*modules):
+    """Raise ImportError if one of the top-level modules is not installed.
+
+    The modules are found without being imported: solvers use it in their
+    import context and import the heavy libraries in ``set_objective``, so
+    that listing and skipping solvers stays fast.
+    """
+    for module in modules:
+        if importlib.util.find_spec(module) is None:
+            raise ImportError(f"No module named '{module}'")
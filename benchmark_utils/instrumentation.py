@@ -0,0 +1,251 @@
+import os
+import sys
+import time
+import functools
+import tracemalloc
+from contextlib import contextmanager
+
+
+# Phases reported in the results. Setup phases are accumulated from the
+# call to set_objective, the other ones only time their last call.
+SETUP_PHASES = (
+    'set_objective', 'data_conversion', 'jit_warmup', 'canonicalization'
+)
+CALL_PHASES = ('run', 'get_result', 'evaluate_result')
+PHASES = SETUP_PHASES + CALL_PHASES
+# Phases evaluating the iterates. With the callback strategy, benchopt
+# evaluates them from inside run: their time is not counted in the phases
+# which contain them, and a phase still running, such as the run of a
+# callback solver, is reported with its time so far.
+EVALUATION_PHASES = ('get_result', 'evaluate_result')
+
+# Phases whose memory use is measured, when MEMORY_ENV_VAR is set: peak
+# resident set size and peak of the allocations traced by tracemalloc,
+# which slows down the allocations.
+MEMORY_PHASES = ('set_objective', 'run')
+MEMORY_ENV_VAR = 'BENCHMARK_LOGREG_L1_TRACE_MEMORY'
+
+# Counters of the work done by the last run, which solvers report with
+# set_counters, e.g. the coordinate updates and heap swaps of the greedy
+# sweeps of cd.
+COUNTERS = ('n_updates', 'n_heap_swaps')
+
+# Wall and CPU times of the phases of the current solver, in seconds. The
+# solver and the objective run in the same process and share it.
+_TIMINGS = {}
+# Peak memory of the phases, and size of the arrays held by the solver, in
+# bytes.
+_MEMORY = {}
+# Counters reported by the current solver.
+_COUNTERS = {}
+# Wall and CPU times of all the EVALUATION_PHASES so far.
+_EVALUATION_TIME = [0., 0.]
+# Phases currently running, innermost last, as (name, wall and CPU times
+# at their start, _EVALUATION_TIME at their start).
+_ACTIVE = []
+
+
+def reset_timings():
+    """Forget the timings of the previous solver."""
+    _TIMINGS.clear()
+    _MEMORY.clear()
+    _COUNTERS.clear()
+    _EVALUATION_TIME[:] = [0., 0.]
+
+
+def set_counters(**counters):
+    """Report counters of the work done by the last run, see COUNTERS."""
+    unknown = set(counters) - set(COUNTERS)
+    if unknown:
+        raise ValueError(f"Unknown counters {sorted(unknown)}.")
+    _COUNTERS.update(counters)
+
+
+def _trace_memory():
+    return os.environ.get(MEMORY_ENV_VAR, '0') not in ('', '0')
+
+
+def _reset_peak_rss():
+    """Reset the peak RSS of the process, when the OS allows it."""
+    try:
+        # Linux only: writing 5 resets VmHWM
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _get_peak_rss():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Peak over the lifetime of the process, in kB on Linux, B on macOS.
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@contextmanager
+def _track_memory(name):
+    """Record the peak memory use of the block as the one of ``name``."""
+    if not _trace_memory():
+        yield
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _reset_peak_rss()
+    if hasattr(tracemalloc, 'reset_peak'):  # Python >= 3.9
+        tracemalloc.reset_peak()
+    traced_start, _ = tracemalloc.get_traced_memory()
+    try:
+        yield
+    finally:
+        _, traced_peak = tracemalloc.get_traced_memory()
+        _MEMORY[f'mem_{name}_peak_rss'] = _get_peak_rss()
+        _MEMORY[f'mem_{name}_peak_traced'] = traced_peak - traced_start
+
+
+def _get_buffers(a):
+    """Return the arrays holding the data of an array or sparse matrix."""
+    import numpy as np
+    from scipy import sparse
+
+    if isinstance(a, np.ndarray):
+        return [a]
+    if sparse.issparse(a):
+        return [
+            getattr(a, attr) for attr in ('data', 'indices', 'indptr')
+            if hasattr(a, attr)
+        ]
+    return []
+
+
+def _record_held_arrays(solver, X):
+    """Record the size of the arrays held by the solver, and how much of
+    it shares memory with X.
+
+    Only the arrays and sparse matrices which are attributes of the solver
+    are found, not the ones held by the objects of external libraries.
+    """
+    import numpy as np
+
+    X_buffers = _get_buffers(X)
+    held_bytes, shared_bytes = 0, 0
+    for value in vars(solver).values():
+        for buffer in _get_buffers(value):
+            held_bytes += buffer.nbytes
+            if any(np.shares_memory(buffer, b) for b in X_buffers):
+                shared_bytes += buffer.nbytes
+    _MEMORY['mem_held_bytes'] = held_bytes
+    _MEMORY['mem_held_shared_with_X_bytes'] = shared_bytes
+
+
+@contextmanager
+def phase(name, reset=False):
+    """Time the block as part of the phase ``name``.
+
+    The wall and CPU times of the block are added to the ones of the
+    previous blocks of the same phase, unless ``reset`` is True.
+    """
+    if reset:
+        _TIMINGS.pop(name, None)
+    start = (name, time.perf_counter(), time.process_time(),
+             *_EVALUATION_TIME)
+    _ACTIVE.append(start)
+    try:
+        yield
+    finally:
+        wall, cpu = _get_elapsed(start)
+        _ACTIVE.pop()
+        old_wall, old_cpu = _TIMINGS.get(name, (0., 0.))
+        _TIMINGS[name] = (old_wall + wall, old_cpu + cpu)
+        if name in EVALUATION_PHASES:
+            _EVALUATION_TIME[0] += wall
+            _EVALUATION_TIME[1] += cpu
+
+
+def _get_elapsed(start):
+    """Wall and CPU times of a running phase, without its evaluations."""
+    name, t_wall, t_cpu, eval_wall, eval_cpu = start
+    wall = time.perf_counter() - t_wall
+    cpu = time.process_time() - t_cpu
+    if name not in EVALUATION_PHASES:
+        wall -= _EVALUATION_TIME[0] - eval_wall
+        cpu -= _EVALUATION_TIME[1] - eval_cpu
+    return wall, cpu
+
+
+def get_timings():
+    """Return the timings, memory metrics and counters as a flat dict, to
+    add to evaluate_result.
+
+    All the phases are reported, with 0 for the ones which did not happen,
+    so that every solver has the same columns. Phases still running, such
+    as the run of a solver with the callback strategy, are reported with
+    their time so far, without the time of EVALUATION_PHASES. Memory
+    metrics which were not measured and counters which were not reported
+    are NaN.
+    """
+    timings = {}
+    running = {start[0]: _get_elapsed(start) for start in _ACTIVE}
+    for name in PHASES:
+        wall, cpu = _TIMINGS.get(name, (0., 0.))
+        if name in running:
+            wall += running[name][0]
+            cpu += running[name][1]
+        timings[f'time_{name}_wall'] = wall
+        timings[f'time_{name}_cpu'] = cpu
+    memory_keys = ['mem_held_bytes', 'mem_held_shared_with_X_bytes'] + [
+        f'mem_{name}_peak_{kind}'
+        for name in MEMORY_PHASES for kind in ('rss', 'traced')
+    ]
+    for key in memory_keys:
+        timings[key] = _MEMORY.get(key, float('nan'))
+    for key in COUNTERS:
+        timings[key] = _COUNTERS.get(key, float('nan'))
+    return timings
+
+
+def instrument(solver_class):
+    """Class decorator timing set_objective, run and get_result of a solver.
+
+    Calls to ``run`` made from another phase, such as the JIT warmup in
+    ``set_objective``, are counted in that phase only. Solvers can time the
+    parts of ``set_objective`` with ``phase('data_conversion')`` and
+    ``phase('jit_warmup')``.
+
+    The arrays held by the solver after ``set_objective`` are compared with
+    X to detect copies and, when the environment variable MEMORY_ENV_VAR
+    is set, the peak memory of ``set_objective`` and ``run`` is measured.
+    """
+    set_objective = solver_class.set_objective
+    run = solver_class.run
+    get_result = solver_class.get_result
+
+    @functools.wraps(set_objective)
+    def timed_set_objective(self, *args, **kwargs):
+        reset_timings()
+        with _track_memory('set_objective'), phase('set_objective'):
+            set_objective(self, *args, **kwargs)
+        _record_held_arrays(self, kwargs['X'] if 'X' in kwargs else args[0])
+
+    @functools.wraps(run)
+    def timed_run(self, *args, **kwargs):
+        if _ACTIVE:
+            return run(self, *args, **kwargs)
+        with _track_memory('run'), phase('run', reset=True):
+            return run(self, *args, **kwargs)
+
+    @functools.wraps(get_result)
+    def timed_get_result(self, *args, **kwargs):
+        with phase('get_result', reset=True):
+            return get_result(self, *args, **kwargs)
+
+    solver_class.set_objective = timed_set_objective
+    solver_class.run = timed_run
+    solver_class.get_result = timed_get_result
+    return solver_class
@@ -0,0 +1,94 @@
+"""Row-major and column-major views of the design matrix, built once.
+
+Solvers declare the layout they iterate on, and get X in this layout with
+``get_layout``. Conversions are done at most once per process and shared
+by all the solvers, and datasets can provide both layouts upfront with
+``register_layout``. ``make_tiny_problem`` builds a problem in the same
+layout as X, to compile numba kernels without running them on X.
+"""
+import weakref
+
+import numpy as np
+from scipy import sparse
+
+
+# 'row' is CSR for sparse matrices and C order for dense arrays, 'column'
+# is CSC or Fortran order.
+LAYOUTS = ('row', 'column')
+
+# Shape of the problems returned by make_tiny_problem.
+TINY_SHAPE = (4, 3)
+
+# id(X) -> {layout: view}, the view being None when it is X itself. The
+# entries hold no reference to X, and are removed when X is garbage
+# collected: the views are freed with X, and its id is not reused while
+# it is a key.
+_VIEWS = {}
+
+
+def _get_views(X):
+    key = id(X)
+    if key not in _VIEWS:
+        _VIEWS[key] = {}
+        weakref.finalize(X, _VIEWS.pop, key, None)
+    return _VIEWS[key]
+
+
+def _check_layout(layout):
+    if layout not in LAYOUTS:
+        raise ValueError(
+            f"layout should be one of {LAYOUTS}, got {layout!r}."
+        )
+
+
+def register_layout(X, layout, view):
+    """Record ``view`` as the representation of X in ``layout``.
+
+    ``view`` must not hold a reference to X, unless it is X itself, else X
+    and its views are never freed.
+    """
+    _check_layout(layout)
+    _get_views(X)[layout] = None if view is X else view
+
+
+def get_layout(X, layout):
+    """Return X in ``layout``, converting it on first request only."""
+    _check_layout(layout)
+    views = _get_views(X)
+    if layout not in views:
+        if sparse.issparse(X):
+            # no copy when X is already in the right format
+            view = X.tocsr() if layout == 'row' else X.tocsc()
+        elif layout == 'row':
+            view = np.ascontiguousarray(X)
+        else:
+            view = np.asfortranarray(X)
+        views[layout] = None if view is X else view
+    view = views[layout]
+    return X if view is None else view
+
+
+def make_tiny_problem(X, y):
+    """Return a tiny problem on which numba kernels compile to the same
+    specializations as on (X, y).
+
+    numba specializes on the dtype, the memory layout and the
+    writeability of the arrays, e.g. of read-only memory-mapped arrays.
+    """
+    n_samples, n_features = TINY_SHAPE
+    X_tiny = np.arange(1, n_samples * n_features + 1, dtype=X.dtype)
+    X_tiny = X_tiny.reshape(n_samples, n_features)
+    y_tiny = np.where(np.arange(n_samples) % 2, 1, -1).astype(y.dtype)
+    y_tiny.flags.writeable = y.flags.writeable
+    if sparse.issparse(X):
+        X_tiny = sparse.csr_matrix(X_tiny).asformat(X.format)
+        for attr in ('data', 'indices', 'indptr'):
+            buffer = getattr(X, attr)
+            tiny_buffer = getattr(X_tiny, attr).astype(buffer.dtype)
+            tiny_buffer.flags.writeable = buffer.flags.writeable
+            setattr(X_tiny, attr, tiny_buffer)
+        return X_tiny, y_tiny
+    if X.flags.f_contiguous and not X.flags.c_contiguous:
+        X_tiny = np.asfortranarray(X_tiny)
+    X_tiny.flags.writeable = X.flags.writeable
+    return X_tiny, y_tiny
@@ -0,0 +1,279 @@
+"""Micro-benchmarks of the hot kernels of the benchmark.
+
+End-to-end benchopt curves hide where the time goes: this script times the
+kernels on fixed synthetic inputs and the loading of the solver files,
+writes the timings to a JSON file and compares them with a baseline file,
+to catch a slowdown before it distorts published results. Run it from the
+root of the benchmark with::
+
+    $ python -m benchmark_utils.micro_benchmarks -o timings.json
+    $ python -m benchmark_utils.micro_benchmarks --baseline timings.json
+
+The exit code is 1 when a kernel is slower than ``threshold`` times its
+baseline timing. The speedups of the parallel cd epochs over the serial
+ones, with the threads of numba, are reported too.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+
+# (n_samples, n_features) of the synthetic problems
+SIZES = [(1_000, 500), (5_000, 2_000)]
+SPARSE_DENSITY = .05
+# Each kernel is timed N_REPEAT times after a warmup call, which also
+# compiles numba functions, and the minimum is reported.
+N_REPEAT = 7
+# A kernel is flagged when min time > THRESHOLD * baseline min time.
+THRESHOLD = 1.5
+
+# Loads all the solver files in a new process, as benchopt does to list
+# and skip the solvers.
+STARTUP_CODE = """
+import sys, glob, importlib.util
+sys.path.insert(0, {root!r})
+for path in sorted(glob.glob({pattern!r})):
+    spec = importlib.util.spec_from_file_location('solver', path)
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+"""
+
+
+def _make_problem(n_samples, n_features, is_sparse):
+    rng = np.random.default_rng(0)
+    if is_sparse:
+        X = sparse.random(n_samples, n_features, density=SPARSE_DENSITY,
+                          format='csc', random_state=rng)
+    else:
+        X = np.asfortranarray(rng.standard_normal((n_samples, n_features)))
+    y = np.where(rng.random(n_samples) > .5, 1., -1.)
+    return X, y
+
+
+def _time(func, setup=None, n_repeat=N_REPEAT):
+    """Minimum and median time of func(*setup()), setup is not timed."""
+    setup = setup or tuple
+    func(*setup())
+    times = []
+    for _ in range(n_repeat):
+        args = setup()
+        t_start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - t_start)
+    return dict(min=min(times), median=float(np.median(times)),
+                n_repeat=n_repeat)
+
+
+def _bench_problem(X, y, n_repeat):
+    from objective import Objective
+    from numba import get_num_threads
+    from solvers.cd import Solver
+    from solvers.liblinear import dump_libsvm
+    from benchmark_utils.stats import DataStats
+    from benchmark_utils.preprocessing import reduce_columns
+
+    obj = Objective(reg=.1)
+    obj.set_data(X, y)
+    L = obj.stats.squared_col_norms / 4
+    features = np.flatnonzero(L)
+    n_samples, n_features = X.shape
+    results = {}
+
+    def cd_setup():
+        # each timed epoch starts from w = 0
+        return (np.zeros(n_features), np.zeros(n_samples),
+                np.ones(n_samples))
+
+    # parallel epochs make as many concurrent updates as threads
+    block_size = get_num_threads()
+    if sparse.issparse(X):
+        def cd_epoch(w, Xw, exp_yXw):
+            Solver.sparse_cd(X.data, X.indices, X.indptr, y, w, Xw, exp_yXw,
+                             obj.lmbd, L, features, 1, False)
+
+        def parallel_cd_epoch(w, Xw, exp_yXw):
+            Solver.parallel_sparse_cd(
+                X.data, X.indices, X.indptr, y, w, Xw, exp_yXw, obj.lmbd, L,
+                features, 1, False, block_size, 0)
+        results['sparse_cd_epoch'] = _time(cd_epoch, cd_setup, n_repeat)
+        results['parallel_sparse_cd_epoch'] = _time(
+            parallel_cd_epoch, cd_setup, n_repeat)
+    else:
+        def cd_epoch(w, Xw, exp_yXw):
+            Solver.cd(X, y, w, Xw, exp_yXw, obj.lmbd, L, features, 1, False)
+
+        def parallel_cd_epoch(w, Xw, exp_yXw):
+            Solver.parallel_cd(X, y, w, Xw, exp_yXw, obj.lmbd, L, features,
+                               1, False, block_size, 0)
+        results['cd_epoch'] = _time(cd_epoch, cd_setup, n_repeat)
+        results['parallel_cd_epoch'] = _time(
+            parallel_cd_epoch, cd_setup, n_repeat)
+
+    rng = np.random.default_rng(1)
+
+    def evaluate_setup():
+        # a new beta, so that X @ beta is not reused from the previous call
+        beta = rng.standard_normal(n_features)
+        beta[rng.random(n_features) > .1] = 0
+        obj._beta_cache, obj._X_beta_cache = None, None
+        return (beta,)
+    results['evaluate_result'] = _time(
+        obj.evaluate_result, evaluate_setup, n_repeat)
+
+    def lambda_max_setup():
+        # statistics computed from scratch, not read from the cache
+        obj.stats._path.unlink(missing_ok=True)
+        obj.stats = DataStats(X, y)
+        return ()
+    results['get_lambda_max'] = _time(
+        obj._get_lambda_max, lambda_max_setup, n_repeat)
+
+    results['reduce_columns'] = _time(
+        lambda: reduce_columns(X), n_repeat=n_repeat)
+
+    # the Liblinear solver dumps the row layout of X
+    X_csr = X.tocsr() if sparse.issparse(X) else X
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = Path(tmp_dir) / "data.txt"
+        results['liblinear_dump'] = _time(
+            lambda: dump_libsvm(X_csr, y, filename), n_repeat=n_repeat)
+    return results
+
+
+def _bench_datasets(n_repeat, with_downloads):
+    from datasets.simulated import Dataset as Simulated
+    from datasets.libsvm import Dataset as Libsvm
+    from datasets.leukemia import Dataset as Leukemia
+
+    datasets = {
+        'simulated_dense': lambda: Simulated(
+            n_samples=5_000, n_features=2_000),
+        'simulated_sparse': lambda: Simulated(
+            n_samples=5_000, n_features=2_000, density=SPARSE_DENSITY),
+    }
+    if with_downloads:
+        # the first, untimed, call downloads and caches the data
+        datasets['libsvm_rcv1'] = lambda: Libsvm(dataset="rcv1.binary")
+        datasets['leukemia'] = Leukemia
+
+    # a new instance for each call, as datasets keep their data in memory
+    return {
+        f'get_data[{name}]': _time(
+            lambda dataset: dataset.get_data(),
+            lambda: (make_dataset(),), n_repeat
+        )
+        for name, make_dataset in datasets.items()
+    }
+
+
+def _bench_startup(n_repeat):
+    root = Path(__file__).parents[1]
+    code = STARTUP_CODE.format(
+        root=str(root), pattern=str(root / "solvers" / "*.py"))
+    return {'startup[solvers]': _time(
+        lambda: subprocess.run([sys.executable, '-c', code], check=True),
+        n_repeat=n_repeat
+    )}
+
+
+def run_micro_benchmarks(n_repeat=N_REPEAT, with_downloads=False):
+    """Return the timings of all the kernels, keyed by name."""
+    results = _bench_startup(n_repeat)
+    for n_samples, n_features in SIZES:
+        for is_sparse in [False, True]:
+            X, y = _make_problem(n_samples, n_features, is_sparse)
+            key = (f"{'sparse' if is_sparse else 'dense'}"
+                   f"-{n_samples}x{n_features}")
+            for name, timing in _bench_problem(X, y, n_repeat).items():
+                results[f'{name}[{key}]'] = timing
+    results.update(_bench_datasets(n_repeat, with_downloads))
+    return results
+
+
+def get_speedups(results):
+    """Return the ratios of the min times of the serial and parallel cd
+    epochs, keyed by the name of the parallel epoch."""
+    return {
+        name: results[name[len('parallel_'):]]['min'] / timing['min']
+        for name, timing in results.items() if name.startswith('parallel_')
+    }
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Return the kernels whose min time is above threshold * baseline."""
+    regressions = {}
+    for name, timing in results.items():
+        if name not in baseline:
+            continue
+        ratio = timing['min'] / baseline[name]['min']
+        if ratio > threshold:
+            regressions[name] = ratio
+    return regressions
+
+
+def _get_metadata():
+    import scipy
+    metadata = dict(
+        date=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        python=platform.python_version(), machine=platform.machine(),
+        processor=platform.processor(), numpy=np.__version__,
+        scipy=scipy.__version__,
+    )
+    try:
+        import numba
+        metadata['numba'] = numba.__version__
+        metadata['numba_threads'] = numba.get_num_threads()
+    except ImportError:
+        metadata['numba'] = None
+    return metadata
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-o', '--output', default='micro_benchmarks.json',
+                        help="JSON file where the timings are written.")
+    parser.add_argument('--baseline',
+                        help="JSON file of timings to compare with.")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="Flag kernels slower than threshold * baseline.")
+    parser.add_argument('--n-repeat', type=int, default=N_REPEAT)
+    parser.add_argument('--with-downloads', action='store_true',
+                        help="Also time the datasets that are downloaded.")
+    args = parser.parse_args(argv)
+
+    # the objective, solvers and datasets are imported from the benchmark
+    sys.path.insert(0, str(Path(__file__).parents[1]))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # start from an empty cache, and leave the benchmark one untouched
+        os.environ["BENCHMARK_LOGREG_L1_CACHE"] = cache_dir
+        results = run_micro_benchmarks(args.n_repeat, args.with_downloads)
+
+    speedups = get_speedups(results)
+    with open(args.output, 'w') as f:
+        json.dump(dict(metadata=_get_metadata(), results=results,
+                       speedups=speedups), f, indent=2)
+    for name, timing in results.items():
+        print(f"{name:<45} {timing['min'] * 1e3:10.3f} ms")
+    for name, speedup in speedups.items():
+        print(f"SPEEDUP {name}: {speedup:.2f}x the speed of the serial epoch")
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+    for name, ratio in regressions.items():
+        print(f"REGRESSION {name}: {ratio:.2f}x slower than the baseline")
+    return int(len(regressions) > 0)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""On-disk cache of datasets as .npy files, loaded with memory mapping.
+
+Memory-mapped arrays are backed by the page cache, which is shared by all
+the processes loading the same dataset, instead of each of them holding a
+private copy. They are mapped copy-on-write: they are writeable, as the
+compiled kernels of some solvers reject read-only buffers, and a process
+writing to them only copies the pages it modifies, never the file.
+"""
+import json
+import shutil
+import hashlib
+
+import numpy as np
+from scipy import sparse
+
+from .cache import get_cache_dir
+from .layouts import register_layout
+
+
+# Bump when the layout of the cache changes, to invalidate old entries.
+FORMAT_VERSION = 2
+# Checksums cover the size of the files, and their first and last bytes:
+# this detects truncated or partially written files without reading them.
+CHECKSUM_BYTES = 1 << 20
+
+
+def _checksum(path):
+    h = hashlib.blake2b(digest_size=16)
+    size = path.stat().st_size
+    h.update(str(size).encode())
+    with open(path, 'rb') as f:
+        h.update(f.read(CHECKSUM_BYTES))
+        f.seek(max(size - CHECKSUM_BYTES, 0))
+        h.update(f.read(CHECKSUM_BYTES))
+    return h.hexdigest()
+
+
+def _to_arrays(X):
+    if not sparse.issparse(X):
+        return dict(X=X)
+    # int32 indices, as scipy would otherwise downcast them, with a copy
+    if max(X.nnz, *X.shape) < np.iinfo(np.int32).max:
+        index_dtype = np.int32
+    else:
+        index_dtype = np.int64
+    # Both CSR and CSC are stored, so solvers never have to convert X.
+    arrays = {}
+    for fmt, M in [('csr', X.tocsr()), ('csc', X.tocsc())]:
+        M.sort_indices()
+        arrays[f"X_{fmt}_data"] = M.data
+        arrays[f"X_{fmt}_indices"] = M.indices.astype(index_dtype, copy=False)
+        arrays[f"X_{fmt}_indptr"] = M.indptr.astype(index_dtype, copy=False)
+    return arrays
+
+
+def dump_dataset(name, X, y, feature_map=None):
+    """Store X, dense or sparse, and y in the cache under ``name``.
+
+    Sparse matrices are stored both in CSR and CSC formats. The
+    ``feature_map`` of reduced datasets, see ``reduce_columns``, is stored
+    with them.
+    """
+    cache_dir = get_cache_dir("datasets")
+    path = cache_dir / name
+    tmp_path = cache_dir / f"{name}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir()
+
+    arrays = _to_arrays(X)
+    arrays['y'] = y
+    if feature_map is not None:
+        arrays['feature_map'] = feature_map
+    for key, array in arrays.items():
+        np.save(tmp_path / f"{key}.npy", np.asarray(array))
+    meta = dict(
+        version=FORMAT_VERSION,
+        format=X.format if sparse.issparse(X) else 'dense',
+        shape=X.shape,
+        checksums={
+            key: _checksum(tmp_path / f"{key}.npy") for key in arrays
+        },
+    )
+    # meta.json is written last: it marks the entry as complete
+    with open(tmp_path / "meta.json", 'w') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(path, ignore_errors=True)
+    tmp_path.rename(path)
+
+
+def load_dataset(name):
+    """Load X, y and feature_map memory-mapped, copy-on-write, from the
+    cache.
+
+    For sparse matrices, X is returned in its original format, and its
+    other format is registered with ``register_layout``.
+
+    feature_map is None when the dataset was stored without it. Returns
+    None when ``name`` is not in the cache, or when the entry was written
+    with another format version or fails its checksum.
+    """
+    path = get_cache_dir("datasets") / name
+    try:
+        with open(path / "meta.json") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != FORMAT_VERSION:
+        return None
+
+    arrays = {}
+    for key, checksum in meta['checksums'].items():
+        file = path / f"{key}.npy"
+        if not file.exists() or _checksum(file) != checksum:
+            return None
+        arrays[key] = np.load(file, mmap_mode='c')
+
+    feature_map = arrays.get('feature_map')
+    if meta['format'] == 'dense':
+        return arrays['X'], arrays['y'], feature_map
+
+    shape = tuple(meta['shape'])
+    X_csr, X_csc = [
+        matrix(
+            tuple(arrays[f"X_{fmt}_{key}"]
+                  for key in ['data', 'indices', 'indptr']),
+            shape=shape, copy=False
+        )
+        for fmt, matrix in [('csr', sparse.csr_matrix),
+                            ('csc', sparse.csc_matrix)]
+    ]
+    X = X_csr if meta['format'] == 'csr' else X_csc
+    register_layout(X, 'row', X_csr)
+    register_layout(X, 'column', X_csc)
+    return X, arrays['y'], feature_map
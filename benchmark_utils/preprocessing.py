@@ -0,0 +1,86 @@
+"""Reduction of the design matrix to its distinct nonzero columns.
+
+Zero columns never enter the model, and duplicate columns can be merged
+into one: for the L1 penalty, the weight of a group of identical columns
+can be put on one of them without changing the objective. The reduced
+problem has the same optimal value, and its solutions are mapped back to
+the original features with the ``feature_map`` of ``reduce_columns``.
+"""
+import numpy as np
+from scipy import sparse
+
+
+def _equal_columns(X, a, b):
+    if not sparse.issparse(X):
+        return np.array_equal(X[:, a], X[:, b])
+    sl_a = slice(X.indptr[a], X.indptr[a + 1])
+    sl_b = slice(X.indptr[b], X.indptr[b + 1])
+    return (np.array_equal(X.indices[sl_a], X.indices[sl_b])
+            and np.array_equal(X.data[sl_a], X.data[sl_b]))
+
+
+def reduce_columns(X, random_state=0):
+    """Remove the zero columns of X, and all but the first of duplicate
+    columns.
+
+    Duplicates are found by hashing the columns with two random
+    projections, and checked exactly: columns with equal projections but
+    different content are all kept.
+
+    Parameters
+    ----------
+    X : ndarray or sparse matrix, shape (n_samples, n_features)
+        The design matrix.
+    random_state : int
+        Seed of the random projections.
+
+    Returns
+    -------
+    X_reduced : ndarray or sparse matrix, shape (n_samples, n_kept)
+        The kept columns of X, in the format of X.
+    feature_map : ndarray of int, shape (n_features,)
+        Index in X_reduced of each column of X, or -1 if it was removed.
+    """
+    n_samples, n_features = X.shape
+    if sparse.issparse(X):
+        X_col = X.tocsc()
+        if not X_col.has_sorted_indices:
+            X_col = X_col.sorted_indices()
+        nonzero = np.diff(X_col.indptr) > 0
+    else:
+        X_col = np.asfortranarray(X)
+        nonzero = np.count_nonzero(X_col, axis=0) > 0
+    if not nonzero.any():
+        # the reduced problem would have no feature, and no lambda_max
+        raise ValueError("All the columns of X are zero.")
+
+    # identical columns have identical projections
+    rng = np.random.default_rng(random_state)
+    projections = np.asarray(X_col.T @ rng.standard_normal((n_samples, 2)))
+    candidates = np.flatnonzero(nonzero)
+    # stable sort: the first column of a group of duplicates is kept
+    order = candidates[np.lexsort(projections[candidates].T[::-1])]
+    same = (np.diff(projections[order], axis=0) == 0).all(axis=1)
+
+    # runs of consecutive columns with equal projections
+    counts = np.bincount(np.concatenate([[0], np.cumsum(~same)]))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    keep = np.ones(len(order), dtype=bool)
+    for run in np.flatnonzero(counts > 1):
+        representatives = []
+        for k in range(starts[run], starts[run] + counts[run]):
+            for rep in representatives:
+                if _equal_columns(X_col, order[k], rep):
+                    keep[k] = False
+                    break
+            else:
+                representatives.append(order[k])
+
+    kept = np.sort(order[keep])
+    feature_map = np.full(n_features, -1)
+    feature_map[kept] = np.arange(len(kept))
+    if len(kept) == n_features:
+        return X, feature_map
+    if sparse.issparse(X):
+        return X_col[:, kept].asformat(X.format), feature_map
+    return X[:, kept], feature_map
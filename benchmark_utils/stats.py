@@ -0,0 +1,93 @@
+import os
+import weakref
+
+import numpy as np
+from scipy import sparse
+
+from .cache import get_cache_dir, hash_data
+
+
+# Statistics of the data in use in this process, see get_data_stats. The
+# entries are removed when their DataStats is no longer used, so that they
+# do not keep X and y alive. A DataStats holds a reference to X and y, so
+# their ids stay valid while it is in the cache.
+_MEMORY_CACHE = weakref.WeakValueDictionary()
+
+
+def get_data_stats(X, y):
+    """Return the DataStats of (X, y), shared across calls in a process."""
+    key = (id(X), id(y))
+    stats = _MEMORY_CACHE.get(key)
+    if stats is None:
+        stats = _MEMORY_CACHE[key] = DataStats(X, y)
+    return stats
+
+
+class DataStats:
+    """Reductions over (X, y) shared by the objective and the solvers.
+
+    Each statistic is computed on first access and persisted on disk, in a
+    file keyed by a hash of the content of (X, y), so it is computed once
+    per machine.
+    """
+
+    def __init__(self, X, y):
+        self.X, self.y = X, y
+        self.data_hash = hash_data(X, y)
+        self._path = get_cache_dir("data_stats") / f"{self.data_hash}.npz"
+        self._values = {}
+        if self._path.exists():
+            with np.load(self._path) as values:
+                self._values.update(values)
+
+    def _get(self, name, compute):
+        if name not in self._values:
+            self._values[name] = np.asarray(compute())
+            # write to a temporary file first, other processes can be reading
+            tmp_path = self._path.with_suffix(f".{os.getpid()}.tmp.npz")
+            np.savez(tmp_path, **self._values)
+            os.replace(tmp_path, self._path)
+        return self._values[name]
+
+    def _squared_norms(self, axis):
+        # accumulate in float64 whatever the dtype of X
+        if sparse.issparse(self.X):
+            return self.X.power(2).sum(axis=axis, dtype=np.float64).A1
+        return (self.X ** 2).sum(axis=axis, dtype=np.float64)
+
+    @property
+    def squared_col_norms(self):
+        return self._get('squared_col_norms', lambda: self._squared_norms(0))
+
+    @property
+    def squared_row_norms(self):
+        return self._get('squared_row_norms', lambda: self._squared_norms(1))
+
+    @property
+    def Xty(self):
+        return self._get('Xty', lambda: self.X.T @ self.y)
+
+    @property
+    def lambda_max(self):
+        return self._get('lambda_max', lambda: abs(self.Xty).max() / 2)
+
+    @property
+    def squared_spectral_norm(self):
+        return self._get('squared_spectral_norm', self._power_iteration)
+
+    def _power_iteration(self, max_iter=100, tol=1e-6):
+        """Estimate ||X||_2^2, with a small margin as it is approached from
+        below."""
+        rng = np.random.default_rng(0)
+        v = rng.standard_normal(self.X.shape[1])
+        v /= np.linalg.norm(v)
+        sq_norm = 0.
+        for _ in range(max_iter):
+            v = self.X.T @ (self.X @ v)
+            sq_norm, old_sq_norm = np.linalg.norm(v), sq_norm
+            if sq_norm == 0:
+                break
+            v /= sq_norm
+            if sq_norm - old_sq_norm <= tol * sq_norm:
+                break
+        return sq_norm * (1 + 1e-3)
@@ -0,0 +1,101 @@
+class WarmStartMixin:
+    """Resume runs from the previous solution instead of restarting.
+
+    benchopt calls ``run(n_iter)`` with increasing values of ``n_iter``, so
+    restarting from zero each time costs a quadratic number of iterations
+    over a sweep. When ``self.warm_start`` is True, solvers using this mixin
+    use benchopt's callback strategy instead: ``run(callback)`` is called
+    once, and runs one more iteration from the previous solution between
+    two calls to the callback. As the callback times the iterations, the
+    time of each point of the curve is the total time of the iterations
+    before it, not only the time of the last ones.
+
+    Solvers must define ``_cold_start()``, which discards the previous
+    solution, and ``_run_iter(n_iter)``, which runs ``n_iter`` iterations
+    from the previous solution when ``self.warm_start`` is True. They call
+    ``_init_warm_start`` at the end of ``set_objective`` and, with warm
+    start, ``_run_resumed`` in ``run``.
+    """
+
+    # Whether resumed runs follow the trajectory of cold runs. Solvers which
+    # only resume from the previous coefficients, and restart the rest of
+    # their state, e.g. working sets or the gradient memory of SAGA, set it
+    # to False: only the final objective of their resumed runs is checked,
+    # to be no worse than the one of a cold run, up to a looser tolerance.
+    exact_resume = True
+
+    def _init_warm_start(self):
+        """Select the stopping strategy, and discard the previous solution.
+        """
+        if self.warm_start:
+            self.stopping_strategy = 'callback'
+        self._cold_start()
+
+    def _run_resumed(self, callback):
+        """Run one iteration at a time, until ``callback()`` is False."""
+        self._cold_start()
+        while True:
+            self._run_iter(1)
+            if not callback():
+                return
+
+
+def check_resumed_trajectory(solver, compute_objective, n_iters, rtol=1e-6,
+                             exact=True):
+    """Check that resumed runs match cold runs with the same n_iter.
+
+    When ``exact`` is False, only checks that the objective after the last
+    iteration of the resumed run is no worse than the one of the cold run.
+
+    Parameters
+    ----------
+    solver : instance of BaseSolver using WarmStartMixin
+        Solver with ``warm_start=True`` on which ``set_objective`` has
+        already been called.
+    compute_objective : callable
+        Maps the dict returned by ``solver.get_result()`` to the value of
+        the objective.
+    n_iters : list of int
+        Increasing iteration counts at which the trajectories are compared.
+    rtol : float
+        Relative tolerance on the objective values.
+    exact : bool
+        Whether the resumed run should follow the trajectory of cold runs,
+        see ``WarmStartMixin.exact_resume``.
+
+    Returns
+    -------
+    resumed, cold : list of float
+        Objective values along the resumed and cold trajectories.
+    """
+    # the k-th call to the callback follows the k-th iteration
+    values = []
+
+    def callback():
+        values.append(compute_objective(solver.get_result()))
+        return len(values) < n_iters[-1]
+
+    solver.run(callback)
+    resumed = [values[n_iter - 1] for n_iter in n_iters]
+
+    cold = []
+    for n_iter in n_iters:
+        solver._cold_start()
+        solver._run_iter(n_iter)
+        cold.append(compute_objective(solver.get_result()))
+
+    if not exact:
+        if resumed[-1] - cold[-1] > rtol * abs(cold[-1]):
+            raise AssertionError(
+                f"Resumed run of {solver} is worse than the cold run after "
+                f"{n_iters[-1]} iterations: {resumed[-1]} > {cold[-1]}."
+            )
+        return resumed, cold
+
+    for n_iter, p_resumed, p_cold in zip(n_iters, resumed, cold):
+        if abs(p_resumed - p_cold) > rtol * abs(p_cold):
+            raise AssertionError(
+                f"Resumed run of {solver} does not match the cold run after "
+                f"{n_iter} iterations: {p_resumed} != {p_cold}."
+            )
+    return resumed, cold
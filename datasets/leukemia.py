@@ -15,12 +15,19 @@ class Dataset(BaseDataset):
     install_cmd = 'conda'
     requirements = ['scikit-learn']
 
+    parameters = {
+        'dtype': ['float64'],
+    }
+
+    def __init__(self, dtype='float64'):
+        self.dtype = dtype
+
     def get_data(self):
         # Unlike libsvm[leukemia], this dataset corresponds to the whole
         # leukemia  data with train + test data (72 samples) and not just
         # the training set.
         X, y = fetch_openml("leukemia", return_X_y=True)
-        X = X.to_numpy()
+        X = X.to_numpy(dtype=self.dtype)
         binarizer = LabelBinarizer(neg_label=-1, pos_label=1)
         y = binarizer.fit_transform(y)[:, 0].astype(X.dtype)
         data = dict(X=X, y=y)
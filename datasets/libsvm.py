@@ -5,6 +5,8 @@ from benchopt import safe_import_context
 
 with safe_import_context() as import_ctx:
     from libsvmdata import fetch_libsvm
+    from benchmark_utils.mmap_cache import dump_dataset, load_dataset
+    from benchmark_utils.preprocessing import reduce_columns
 
 
 class Dataset(BaseDataset):
@@ -13,23 +15,45 @@ class Dataset(BaseDataset):
 
     parameters = {
         "dataset": ["news20.binary", "rcv1.binary", "SUSY"],
+        "dtype": ["float64"],
+        # remove the zero and duplicate columns of X
+        "reduce_columns": [False],
     }
 
     install_cmd = "conda"
     requirements = ["pip:libsvmdata"]
 
-    def __init__(self, dataset="bodyfat"):
+    def __init__(self, dataset="bodyfat", dtype="float64",
+                 reduce_columns=False):
         self.dataset = dataset
-        self.X, self.y = None, None
+        self.dtype = dtype
+        self.reduce_columns = reduce_columns
+        self.X, self.y, self.feature_map = None, None, None
 
     def get_data(self):
 
         if self.X is None:
-            self.X, self.y = fetch_libsvm(self.dataset)
-
-        if self.dataset == "SUSY":
-            self.y = 2 * (self.y > 0) - 1
+            # Parsing the libsvm files is slow: the arrays are cached in
+            # binary files, memory-mapped by all the processes using them.
+            cache_name = f"{self.dataset}-{self.dtype}"
+            if self.reduce_columns:
+                cache_name += "-reduced"
+            cached = load_dataset(cache_name)
+            if cached is None:
+                X, y = fetch_libsvm(self.dataset)
+                X = X.astype(self.dtype, copy=False)
+                y = y.astype(self.dtype, copy=False)
+                if self.dataset == "SUSY":
+                    y = (2 * (y > 0) - 1).astype(self.dtype)
+                feature_map = None
+                if self.reduce_columns:
+                    X, feature_map = reduce_columns(X)
+                dump_dataset(cache_name, X, y, feature_map)
+                cached = load_dataset(cache_name)
+            self.X, self.y, self.feature_map = cached
 
         data = dict(X=self.X, y=self.y)
+        if self.feature_map is not None:
+            data['feature_map'] = self.feature_map
 
         return data
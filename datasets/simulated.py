@@ -1,30 +1,158 @@
 from benchopt import BaseDataset, safe_import_context
 
 with safe_import_context() as import_ctx:
+    import numpy as np
+    from scipy import sparse
+    from scipy.signal import lfilter
     from benchopt.datasets import make_correlated_data
+    from benchmark_utils.preprocessing import reduce_columns
+
+
+# Dense problems with at most this many entries are generated at once by
+# benchopt's make_correlated_data. Larger and sparse ones are generated by
+# chunks of CHUNK_SIZE rows, each with its own seeded generator: the data
+# does not depend on anything but the parameters.
+MAX_SIZE_AT_ONCE = 10 ** 7
+CHUNK_SIZE = 10_000
+# Fraction of nonzero coefficients in the true weights, and signal to noise
+# ratio of the labels, as in benchopt's make_correlated_data.
+W_DENSITY = .2
+SNR = 3
+
+
+def _sample_distinct_columns(rng, rows, n_features):
+    """Draw one column per entry of rows, distinct within each row.
+
+    rows must be sorted. The columns are returned sorted within each row.
+    """
+    cols = rng.integers(n_features, size=len(rows))
+    while True:
+        order = np.lexsort((cols, rows))
+        rows, cols = rows[order], cols[order]
+        is_dup = (rows[1:] == rows[:-1]) & (cols[1:] == cols[:-1])
+        if not is_dup.any():
+            return cols
+        cols[1:][is_dup] = rng.integers(n_features, size=is_dup.sum())
 
 
 class Dataset(BaseDataset):
 
     name = "Simulated"
 
+    # Larger problems can be generated with e.g.
+    # simulated[n_samples=1000000,n_features=1000000,density=1e-5]
     parameters = {
         'n_samples, n_features': [
             (500, 2000),
             (500, 5000),
-        ]
+        ],
+        'density': [1.],
+        'rho': [.6],
+        'dtype': ['float64', 'float32'],
+        # remove the zero and duplicate columns of X, once y is computed
+        'reduce_columns': [False],
+    }
+    # the solvers which only handle sparse data are tested on sparse X
+    test_parameters = {
+        'density': [1., .2],
     }
 
-    def __init__(self, n_samples=10, n_features=50, random_state=42):
+    def __init__(self, n_samples=10, n_features=50, density=1., rho=.6,
+                 random_state=42, dtype='float64', reduce_columns=False):
         self.n_samples = n_samples
         self.n_features = n_features
+        self.density = density
+        self.rho = rho
         self.random_state = random_state
+        self.dtype = dtype
+        self.reduce_columns = reduce_columns
+
+    def _get_rng(self, *keys):
+        return np.random.default_rng([self.random_state, *keys])
+
+    def _make_dense_X(self):
+        """Gaussian features with correlation rho ** |i - j|.
+
+        Each row is an AR(1) process along the features, computed with a
+        linear filter on a chunk of white noise.
+        """
+        X = np.empty((self.n_samples, self.n_features), dtype=self.dtype)
+        scale = np.sqrt(1 - self.rho ** 2)
+        for k, start in enumerate(range(0, self.n_samples, CHUNK_SIZE)):
+            stop = min(start + CHUNK_SIZE, self.n_samples)
+            noise = self._get_rng(0, k).standard_normal(
+                (stop - start, self.n_features))
+            # the first feature has unit variance, as all the others
+            noise[:, 0] /= scale
+            X[start:stop] = lfilter([scale], [1, -self.rho], noise, axis=1)
+        return X
+
+    def _make_sparse_X(self):
+        """CSR matrix where each entry is nonzero with probability density.
+
+        The nonzero entries of a row share a common Gaussian factor with
+        weight rho, so they have correlation rho ** 2.
+        """
+        n_samples, n_features = self.n_samples, self.n_features
+        row_nnz = self._get_rng(1).binomial(
+            n_features, self.density, size=n_samples)
+        nnz = row_nnz.sum()
+        if max(nnz, n_features) < np.iinfo(np.int32).max:
+            index_dtype = np.int32
+        else:
+            index_dtype = np.int64
+        indptr = np.zeros(n_samples + 1, dtype=index_dtype)
+        np.cumsum(row_nnz, out=indptr[1:])
+        indices = np.empty(nnz, dtype=index_dtype)
+        data = np.empty(nnz, dtype=self.dtype)
+
+        scale = np.sqrt(1 - self.rho ** 2)
+        for k, start in enumerate(range(0, n_samples, CHUNK_SIZE)):
+            stop = min(start + CHUNK_SIZE, n_samples)
+            rng = self._get_rng(0, k)
+            rows = np.repeat(np.arange(stop - start), row_nnz[start:stop])
+            lo, hi = indptr[start], indptr[stop]
+            indices[lo:hi] = _sample_distinct_columns(rng, rows, n_features)
+            factor = rng.standard_normal(stop - start)
+            data[lo:hi] = (self.rho * factor[rows]
+                           + scale * rng.standard_normal(hi - lo))
+
+        return sparse.csr_matrix(
+            (data, indices, indptr), shape=(n_samples, n_features))
+
+    def _make_labels(self, X):
+        """Labels of a sparse linear model with noise, by chunks of rows."""
+        rng = self._get_rng(2)
+        w_true = np.zeros(self.n_features)
+        support = rng.choice(
+            self.n_features, max(1, int(W_DENSITY * self.n_features)),
+            replace=False
+        )
+        w_true[support] = rng.standard_normal(len(support))
+        # by chunks, to avoid upcasting the whole of a float32 X at once
+        Xw = np.empty(self.n_samples)
+        for start in range(0, self.n_samples, CHUNK_SIZE):
+            Xw[start:start + CHUNK_SIZE] = X[start:start + CHUNK_SIZE] @ w_true
+        noise = rng.standard_normal(self.n_samples)
+        noise *= np.linalg.norm(Xw) / (np.linalg.norm(noise) * SNR)
+        return np.where(Xw + noise > 0, 1, -1).astype(self.dtype)
 
     def get_data(self):
-        X, y, _ = make_correlated_data(
-            self.n_samples, self.n_features, random_state=self.random_state)
-        y = 2 * (y > 0) - 1
+        if self.density < 1:
+            X = self._make_sparse_X()
+            y = self._make_labels(X)
+        elif self.n_samples * self.n_features > MAX_SIZE_AT_ONCE:
+            X = self._make_dense_X()
+            y = self._make_labels(X)
+        else:
+            X, y, _ = make_correlated_data(
+                self.n_samples, self.n_features, rho=self.rho,
+                random_state=self.random_state)
+            X = X.astype(self.dtype, copy=False)
+            y = (2 * (y > 0) - 1).astype(self.dtype)
 
         data = dict(X=X, y=y)
+        if self.reduce_columns:
+            data['X'], data['feature_map'] = reduce_columns(X)
 
         return data
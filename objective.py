@@ -1,7 +1,21 @@
 import numpy as np
 
 
-from benchopt import BaseObjective
+from benchopt import BaseObjective, safe_import_context
+from benchmark_utils.instrumentation import get_timings, phase
+
+with safe_import_context() as import_ctx:
+    from scipy import sparse
+    from scipy.special import entr, expit
+    from benchmark_utils.stats import get_data_stats
+
+
+# Products restricted to a subset of columns are only used when the subset
+# is smaller than this fraction of the features.
+SUBSET_RATIO = .2
+# Incremental updates accumulate rounding errors: recompute the full product
+# after this many consecutive updates.
+MAX_INCREMENTAL_UPDATES = 50
 
 
 class Objective(BaseObjective):
@@ -10,35 +24,163 @@ class Objective(BaseObjective):
 
     parameters = {
         'fit_intercept': [False],
-        'reg': [.5, .1, .05]
+        'reg': [.5, .1, .05],
+        'n_lambdas': [1],
     }
 
-    def __init__(self, reg=.1, fit_intercept=False):
+    def __init__(self, reg=.1, fit_intercept=False, n_lambdas=1):
         self.reg = reg
         self.fit_intercept = fit_intercept
+        # With n_lambdas > 1, solvers fit a regularization path: lmbd is a
+        # geometric grid from lambda_max to reg * lambda_max, and the result
+        # has one row of coefficients per value of lmbd.
+        self.n_lambdas = n_lambdas
 
-    def set_data(self, X, y):
+    def set_data(self, X, y, feature_map=None):
         if set(y) != set([-1, 1]):
             raise ValueError(
                 f"y must contain only -1 or 1 as values. Got {set(y)}"
             )
         self.X, self.y = X, y
-        self.lmbd = self.reg * self._get_lambda_max()
+        # Datasets can remove the zero and duplicate columns of X, see
+        # benchmark_utils.preprocessing. The reduced problem has the same
+        # objective, dual and lambda_max, so solvers and metrics use it, and
+        # feature_map only maps the final solutions back to the features.
+        self.feature_map = feature_map
+        if feature_map is None:
+            self.reduction_ratio = 1.
+        else:
+            self.reduction_ratio = X.shape[1] / len(feature_map)
+        # column norms, X.T @ y, ... computed once per dataset and machine
+        self.stats = get_data_stats(X, y)
+        if self.n_lambdas == 1:
+            self.lmbd = self.reg * self._get_lambda_max()
+        else:
+            self.lmbd = self._get_lambda_max() * np.geomspace(
+                1, self.reg, self.n_lambdas)
+
+        # Cache of the last evaluated beta and of X @ beta, see _get_X_beta.
+        self._beta_cache, self._X_beta_cache = None, None
+        self._n_incremental = 0
 
     def get_one_result(self):
         n_features = self.X.shape[1]
         if self.fit_intercept:
             n_features += 1
+        if self.n_lambdas > 1:
+            return dict(beta=np.zeros((self.n_lambdas, n_features)))
         return dict(beta=np.zeros(n_features))
 
     def evaluate_result(self, beta):
-        beta = beta.flatten().astype(np.float64)
-        y_X_beta = self.y * (self.X @ beta)
+        # The wall and CPU times of the phases of the solver, from its setup
+        # to this evaluation, and its memory use are reported as extra
+        # columns.
+        with phase('evaluate_result', reset=True):
+            results = self._evaluate_result(beta)
+        return dict(
+            **results, **get_timings(), reduction_ratio=self.reduction_ratio
+        )
+
+    def _evaluate_result(self, beta):
+        if self.n_lambdas == 1:
+            beta = beta.flatten().astype(np.float64)
+            return self._evaluate(beta, self.lmbd, self._get_X_beta(beta))
+
+        # Path: metrics are summed over the path, except the KKT violation
+        # which is the worst one and the support size which is the one of
+        # the last, least regularized, problem.
+        beta = beta.reshape(self.n_lambdas, -1).astype(np.float64)
+        X_beta = self.X @ beta.T
+        results = [
+            self._evaluate(beta[k], lmbd, X_beta[:, k])
+            for k, lmbd in enumerate(self.lmbd)
+        ]
+        return dict(
+            value=sum(res['value'] for res in results),
+            duality_gap=sum(res['duality_gap'] for res in results),
+            kkt_violation=max(res['kkt_violation'] for res in results),
+            support_size=results[-1]['support_size'],
+        )
+
+    def _evaluate(self, beta, lmbd, X_beta):
+        # X @ beta is the only product with X involving beta: it gives both
+        # the primal loss and the residual used to build the dual point.
+        y_X_beta = self.y * X_beta
         l1 = abs(beta).sum()
-        return np.log(1 + np.exp(-y_X_beta)).sum() + self.lmbd * l1
+        # log(1 + exp(-z)) computed without overflow for large |z|
+        loss = np.logaddexp(0, -y_X_beta).sum()
+        p_obj = loss + lmbd * l1
+
+        # residual y / (1 + exp(y X beta)): minus the gradient of the loss
+        # wrt X beta, it is the natural dual point once rescaled.
+        residual = self.y * expit(-y_X_beta)
+        grad = -(self.X.T @ residual)
+        dual_norm = abs(grad).max()
+        scale = min(1., lmbd / dual_norm) if dual_norm > 0 else 1.
+        # with u = y * theta in [0, 1], D(theta) = sum H(u) + H(1 - u) where
+        # H is the entropy.
+        u = scale * expit(-y_X_beta)
+        d_obj = (entr(u) + entr(1 - u)).sum()
+
+        support = beta != 0
+        kkt = np.maximum(abs(grad) - lmbd, 0)
+        kkt[support] = abs(grad[support] + lmbd * np.sign(beta[support]))
+
+        return dict(
+            value=p_obj,
+            duality_gap=p_obj - d_obj,
+            kkt_violation=kkt.max(),
+            support_size=support.sum(),
+        )
+
+    def save_final_results(self, beta):
+        # only needed to map the solution of a reduced problem back
+        if self.feature_map is None:
+            return None
+        beta = np.asarray(beta)
+        kept = self.feature_map >= 0
+        beta_full = np.zeros(beta.shape[:-1] + (len(self.feature_map),))
+        beta_full[..., kept] = beta[..., self.feature_map[kept]]
+        return beta_full
+
+    def _get_X_beta(self, beta):
+        """Compute X @ beta, reusing the product of the previous call.
+
+        Successive results of a solver usually differ on few coordinates, and
+        are sparse: only the columns of X whose coefficient changed, or which
+        are in the support, are used when there are few of them.
+        """
+        n_features = self.X.shape[1]
+        # Column slicing costs a pass over the whole matrix for CSR.
+        slice_columns = not sparse.isspmatrix_csr(self.X)
+        max_columns = SUBSET_RATIO * n_features if slice_columns else -1
+
+        changed = None
+        if (self._beta_cache is not None
+                and self._beta_cache.shape == beta.shape
+                and self._n_incremental < MAX_INCREMENTAL_UPDATES):
+            changed = np.flatnonzero(beta != self._beta_cache)
+        support = np.flatnonzero(beta)
+
+        if changed is not None and len(changed) == 0:
+            X_beta = self._X_beta_cache
+        elif changed is not None and len(changed) <= min(
+                len(support), max_columns):
+            diff = beta[changed] - self._beta_cache[changed]
+            X_beta = self._X_beta_cache + self.X[:, changed] @ diff
+            self._n_incremental += 1
+        elif len(support) <= max_columns:
+            X_beta = self.X[:, support] @ beta[support]
+            self._n_incremental = 0
+        else:
+            X_beta = self.X @ beta
+            self._n_incremental = 0
+
+        self._beta_cache, self._X_beta_cache = beta, X_beta
+        return X_beta
 
     def _get_lambda_max(self):
-        return abs(self.X.T @ self.y).max() / 2
+        return self.stats.lambda_max
 
     def get_objective(self):
-        return dict(X=self.X, y=self.y, lmbd=self.lmbd)
+        return dict(X=self.X, y=self.y, lmbd=self.lmbd, stats=self.stats)
@@ -1,11 +1,15 @@
 from benchopt import BaseSolver, safe_import_context
+from benchmark_utils.warm_start import WarmStartMixin
+from benchmark_utils.instrumentation import instrument
 
 
 with safe_import_context() as import_ctx:
+    import numpy as np
     import blitzl1
 
 
-class Solver(BaseSolver):
+@instrument
+class Solver(WarmStartMixin, BaseSolver):
     name = 'Blitz'
     stopping_strategy = 'iteration'
 
@@ -13,19 +17,59 @@ class Solver(BaseSolver):
     requirements = [
         'pip:git+https://github.com/tbjohns/blitzl1.git@master'
     ]
+    # the working set is rebuilt at each resumed run
+    exact_resume = False
 
-    def set_objective(self, X, y, lmbd):
-        self.X, self.y, self.lmbd = X, y, lmbd
+    parameters = {
+        'warm_start': [False],
+    }
+
+    def skip(self, X, y, lmbd, stats):
+        if self.warm_start and np.ndim(lmbd) > 0:
+            return True, "resumed runs are not supported on paths"
+        return False, None
+
+    def set_objective(self, X, y, lmbd, stats):
+        self.X, self.y = X, y
+        # a single regularization value, or a path solved with warm starts
+        self.is_path = np.ndim(lmbd) > 0
+        self.lmbd_path = np.atleast_1d(lmbd)
 
         blitzl1.set_use_intercept(False)
         blitzl1.set_tolerance(0)
         self.problem = blitzl1.LogRegProblem(self.X, self.y)
+        self._init_warm_start()
+
+    def _cold_start(self):
+        self.coef_ = None
+
+    def _run_iter(self, n_iter):
+        initial_x = self.coef_ if self.warm_start else None
+        self.coef_ = self.problem.solve(
+            self.lmbd_path[0], initial_x=initial_x, max_iter=n_iter).x
 
     def run(self, n_iter):
-        self.coef_ = self.problem.solve(self.lmbd, max_iter=n_iter).x
+        if self.warm_start:
+            # n_iter is benchopt's callback, see WarmStartMixin
+            self._run_resumed(n_iter)
+            return
+
+        if not self.is_path:
+            self._run_iter(n_iter)
+            return
+
+        # each solution warm starts the next, smaller, regularization value
+        coefs, initial_x = [], None
+        for lmbd in self.lmbd_path:
+            initial_x = self.problem.solve(
+                lmbd, initial_x=initial_x, max_iter=n_iter).x
+            coefs.append(initial_x.flatten())
+        self.coef_ = np.array(coefs)
 
     def get_next(self, stop_val):
         return stop_val + 1
 
     def get_result(self):
+        if self.is_path:
+            return dict(beta=self.coef_)
         return dict(beta=self.coef_.flatten())
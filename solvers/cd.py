@@ -1,20 +1,46 @@
 from benchopt import BaseSolver
 from benchopt import safe_import_context
+from benchmark_utils.instrumentation import instrument, phase, set_counters
 
 with safe_import_context() as import_ctx:
     import math
     import numpy as np
     from scipy import sparse
-    from numba import njit
+    from scipy.special import entr
+    from numba import njit, prange, get_num_threads
+    from benchmark_utils.layouts import get_layout, make_tiny_problem
 
 
 if import_ctx.failed_import:
 
-    def njit(f):  # noqa: F811
-        return f
+    def njit(*args, **kwargs):  # noqa: F811
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
 
 
-@njit
+# Number of epochs between two Gap Safe screening tests.
+SCREENING_FREQ = 10
+# Near convergence, the computed duality gap is rounding noise and can be
+# <= 0: the gap used by the screening test is at least GAP_SAFE_RTOL times
+# the primal objective, so that the support is never screened.
+GAP_SAFE_RTOL = 1e-10
+# The working set holds the support and as many other features, and at
+# least WS_SIZE_INIT features. It only grows further, by doubling, when an
+# outer iteration does not decrease the KKT violation.
+WS_SIZE_INIT = 10
+# The working set strategy stops when the KKT violation is below WS_TOL
+# times lmbd, as it never reaches 0 in floating point.
+WS_TOL = 1e-10
+# Inner solver on the working set: the KKT violation is checked every
+# INNER_CHECK_FREQ epochs, for at most MAX_INNER_EPOCHS epochs.
+INNER_CHECK_FREQ = 10
+MAX_INNER_EPOCHS = 100
+# Number of epochs between two Anderson extrapolations.
+ANDERSON_K = 5
+
+
+@njit(cache=True)
 def st(x, mu):
     if x > mu:
         return x - mu
@@ -23,128 +49,694 @@ def st(x, mu):
     return 0.
 
 
-@njit
-def _newton_step_size(X, exp_yXw, j):
+@njit(cache=True)
+def _log1p_exp(z):
+    # log(1 + exp(z)) without overflow
+    if z > 0:
+        return z + math.log1p(math.exp(-z))
+    return math.log1p(math.exp(z))
+
+
+@njit(cache=True)
+def _cd_step(X, y, w, exp_yXw, lmbd, L, j, newton_step):
+    """Return the new value of w[j] after a CD step, without applying it."""
+    # gradient and hessian diagonal in a single pass on X[:, j]
+    grad_j = 0.
     hess_jj = 0.
-    for i in range(len(X)):
-        hess_jj += X[i, j]**2 * exp_yXw[i] / (1 + exp_yXw[i])**2
-    return 1 / hess_jj
+    for i in range(X.shape[0]):
+        sigma_i = 1 / (1 + exp_yXw[i])
+        grad_j -= y[i] * X[i, j] * sigma_i
+        if newton_step:
+            hess_jj += X[i, j] ** 2 * sigma_i * (1 - sigma_i)
+
+    if newton_step:
+        step = 1 / hess_jj
+    else:
+        step = 1 / L[j]
+    return st(w[j] - grad_j * step, step * lmbd)
 
 
-@njit
-def _newton_step_size_sparse(X_data, X_indices, X_indptr, exp_yXw, j):
+@njit(cache=True)
+def _sparse_cd_step(X_data, X_indices, X_indptr, y, w, exp_yXw, lmbd, L, j,
+                    newton_step):
     start, end = X_indptr[j:j+2]
+    grad_j = 0.
     hess_jj = 0.
     for ind in range(start, end):
         i = X_indices[ind]
-        hess_jj += X_data[ind]**2 * exp_yXw[i] / (1 + exp_yXw[i])**2
-    return 1 / hess_jj
+        sigma_i = 1 / (1 + exp_yXw[i])
+        grad_j -= y[i] * X_data[ind] * sigma_i
+        if newton_step:
+            hess_jj += X_data[ind]**2 * sigma_i * (1 - sigma_i)
+
+    if newton_step:
+        step = 1 / hess_jj
+    else:
+        step = 1 / L[j]
+    return st(w[j] - grad_j * step, step * lmbd)
+
+
+@njit(cache=True)
+def _update_Xw(X, y, Xw, exp_yXw, j, diff):
+    for i in range(X.shape[0]):
+        Xw[i] += diff * X[i, j]
+        exp_yXw[i] = math.exp(y[i] * Xw[i])
+
+
+@njit(cache=True)
+def _sparse_update_Xw(X_data, X_indices, X_indptr, y, Xw, exp_yXw, j, diff):
+    for ind in range(X_indptr[j], X_indptr[j + 1]):
+        i = X_indices[ind]
+        Xw[i] += diff * X_data[ind]
+        exp_yXw[i] = math.exp(y[i] * Xw[i])
+
+
+# Max-heap of coordinates, stored in two arrays of priorities and indices.
+# The helpers return the number of swaps, to measure the cost of the index.
+
+@njit(cache=True)
+def _sift_down(priorities, heap, size, pos):
+    n_swaps = 0
+    while 2 * pos + 1 < size:
+        child = 2 * pos + 1
+        if child + 1 < size and priorities[child + 1] > priorities[child]:
+            child += 1
+        if priorities[child] <= priorities[pos]:
+            break
+        priorities[pos], priorities[child] = priorities[child], priorities[pos]
+        heap[pos], heap[child] = heap[child], heap[pos]
+        pos = child
+        n_swaps += 1
+    return n_swaps
+
+
+@njit(cache=True)
+def _sift_up(priorities, heap, pos):
+    n_swaps = 0
+    while pos > 0:
+        parent = (pos - 1) // 2
+        if priorities[parent] >= priorities[pos]:
+            break
+        priorities[pos], priorities[parent] = (
+            priorities[parent], priorities[pos])
+        heap[pos], heap[parent] = heap[parent], heap[pos]
+        pos = parent
+        n_swaps += 1
+    return n_swaps
+
+
+@njit(cache=True)
+def _heapify(priorities, heap, size):
+    n_swaps = 0
+    for pos in range(size // 2 - 1, -1, -1):
+        n_swaps += _sift_down(priorities, heap, size, pos)
+    return n_swaps
+
+
+@njit(cache=True)
+def _heap_pop(priorities, heap, size):
+    # the top is in position 0, and the heap then has size - 1 elements
+    priorities[0], heap[0] = priorities[size - 1], heap[size - 1]
+    return _sift_down(priorities, heap, size - 1, 0)
+
+
+@njit(cache=True)
+def _heap_push(priorities, heap, size, priority, j):
+    priorities[size], heap[size] = priority, j
+    return _sift_up(priorities, heap, size)
 
 
+def precompile(dtypes=('float64', 'float32')):
+    """Compile all the kernels, for dense and sparse data of each dtype.
+
+    The compiled kernels are stored in the on-disk cache of numba, next to
+    this file, so that no process compiles them again. Run it once per
+    machine, e.g. after installing the benchmark, with::
+
+        $ python -m solvers.cd
+    """
+    for dtype in dtypes:
+        X = np.asfortranarray(np.ones((2, 2), dtype=dtype))
+        X_sparse = sparse.csc_matrix(X)
+        X_sparse_64 = sparse.csc_matrix(X)
+        X_sparse_64.indices = X_sparse_64.indices.astype(np.int64)
+        X_sparse_64.indptr = X_sparse_64.indptr.astype(np.int64)
+        for X_data in [X, X_sparse, X_sparse_64]:
+            for writeable in [True, False]:
+                X_tiny, y_tiny = make_tiny_problem(
+                    X_data, np.ones(2, dtype=dtype))
+                n_samples, n_features = X_tiny.shape
+                if sparse.issparse(X_tiny):
+                    X_args = (X_tiny.data, X_tiny.indices, X_tiny.indptr)
+                    kernels = (Solver.sparse_cd,
+                               Solver.greedy_sweep_sparse_cd,
+                               Solver.parallel_sparse_cd)
+                else:
+                    X_args = (X_tiny,)
+                    kernels = (Solver.cd, Solver.greedy_sweep_cd,
+                               Solver.parallel_cd)
+                for buffer in (*X_args, y_tiny):
+                    buffer.flags.writeable = writeable
+                for newton_step in [False, True]:
+                    for kernel in kernels:
+                        args = (
+                            *X_args, y_tiny, np.zeros(n_features),
+                            np.zeros(n_samples), np.ones(n_samples), 1.,
+                            np.ones(n_features), np.arange(n_features), 1,
+                            newton_step
+                        )
+                        if kernel in (Solver.parallel_cd,
+                                      Solver.parallel_sparse_cd):
+                            args = (*args, 2, 0)
+                        kernel(*args)
+
+
+@instrument
 class Solver(BaseSolver):
     name = "cd"
 
     install_cmd = 'conda'
     requirements = ['numba']
+    # CSC or Fortran order, to compute gradients on contiguous columns
+    X_layout = 'column'
 
     parameters = {
         'newton_step': [False, True],
+        'strategy': ['full', 'screening', 'working_set'],
+        'parallel': [False],
+        'acceleration': [None, 'anderson'],
+        # 'cyclic', 'shuffle' or 'greedy_sweep'
+        'selection': ['cyclic'],
     }
+    references = [
+        'Q. Bertrand and M. Massias, "Anderson acceleration of coordinate '
+        'descent", AISTATS (2021)'
+    ]
 
-    def set_objective(self, X, y, lmbd):
-        self.y, self.lmbd = y, lmbd
+    def skip(self, X, y, lmbd, stats):
+        if self.parallel and self.selection != 'cyclic':
+            return True, "parallel cd draws its own random blocks"
+        return False, None
 
-        if sparse.issparse(X):
-            self.X = X
-        else:
-            # use Fortran order to compute gradient on contiguous columns
-            self.X = np.asfortranarray(X)
+    def set_objective(self, X, y, lmbd, stats):
+        self.y, self.stats = y, stats
+        with phase('data_conversion'):
+            self.X = get_layout(X, self.X_layout)
+        # a single regularization value, or a path solved with warm starts
+        self.is_path = np.ndim(lmbd) > 0
+        self.lmbd_path = np.atleast_1d(lmbd)
 
-        # Make sure we cache the numba compilation.
-        self.run(1)
+        with phase('jit_warmup'):
+            self._warm_up()
+
+    def _warm_up(self):
+        """Compile the kernels used by run on a tiny problem.
+
+        The kernels are cached on disk, so only the first process to use a
+        specialization compiles it.
+        """
+        X, y = self.X, self.y
+        self.X, self.y = make_tiny_problem(X, y)
+        try:
+            n_samples, n_features = self.X.shape
+            self.w = np.zeros(n_features)
+            self.Xw = np.zeros(n_samples)
+            self.exp_yXw = np.ones(n_samples)
+            self.n_heap_swaps, self.n_updates = 0, 0
+            self._rng = np.random.default_rng(0)
+            self.lmbd = 1.
+            L = np.ones(n_features)
+            self._run_kernel(np.flatnonzero(L), L, 1)
+        finally:
+            self.X, self.y = X, y
 
     def _get_lipschitz_csts(self):
-        if sparse.issparse(self.X):
-            L = sparse.linalg.norm(self.X, axis=0)**2 / 4
-        else:
-            L = (self.X ** 2).sum(axis=0) / 4
-        return L
+        return self.stats.squared_col_norms / 4
 
     def run(self, n_iter):
+        # X can be float32 to save memory bandwidth, but the iterates and
+        # the buffers derived from Xw are kept in float64.
+        n_samples, n_features = self.X.shape
+        self.w = np.zeros(n_features)
+        self.Xw = np.zeros(n_samples)
+        self.exp_yXw = np.ones(n_samples)
+        self._rng = np.random.default_rng(0)
+        # cost of the greedy sweeps, in heap swaps per coordinate update,
+        # reported with the results
+        self.n_heap_swaps, self.n_updates = 0, 0
+        if self.acceleration == 'anderson':
+            # ring buffers of the last ANDERSON_K + 1 iterates and of Xw
+            self._w_buffer = np.empty((ANDERSON_K + 1, n_features))
+            self._Xw_buffer = np.empty((ANDERSON_K + 1, n_samples))
+
         L = self._get_lipschitz_csts()
-        if sparse.issparse(self.X):
-            self.w = self.sparse_cd(
-                self.X.data, self.X.indices, self.X.indptr, self.y, self.lmbd,
-                L, n_iter, self.newton_step
+        self.coefs = []
+        for lmbd in self.lmbd_path:
+            # the kernels and the strategies read the current value of lmbd
+            self.lmbd = lmbd
+            if self.acceleration == 'anderson':
+                self._reset_anderson()
+            self._solve(np.flatnonzero(L), L, n_iter)
+            if self.is_path:
+                self.coefs.append(self.w.copy())
+        if self.selection == 'greedy_sweep':
+            set_counters(
+                n_updates=self.n_updates, n_heap_swaps=self.n_heap_swaps)
+
+    def _solve(self, features, L, n_iter):
+        if self.strategy == 'working_set':
+            self._run_working_set(features, L, n_iter)
+        elif self.strategy == 'screening':
+            for t in range(0, n_iter, SCREENING_FREQ):
+                features = self._screen(features, L)
+                self._run_epochs(
+                    features, L, min(SCREENING_FREQ, n_iter - t))
+        else:
+            self._run_epochs(features, L, n_iter)
+
+    def _run_epochs(self, features, L, n_epochs):
+        if self.acceleration is None and self.selection != 'shuffle':
+            self._run_kernel(features, L, n_epochs)
+            return
+        for _ in range(n_epochs):
+            if self.selection == 'shuffle':
+                features = self._rng.permutation(features)
+            self._run_kernel(features, L, 1)
+            if self.acceleration != 'anderson':
+                continue
+            self._w_buffer[self._n_buffered] = self.w
+            self._Xw_buffer[self._n_buffered] = self.Xw
+            self._n_buffered += 1
+            if self._n_buffered == ANDERSON_K + 1:
+                self._anderson_extrapolation()
+
+    def _reset_anderson(self):
+        self._w_buffer[0] = self.w
+        self._Xw_buffer[0] = self.Xw
+        self._n_buffered = 1
+
+    def _anderson_extrapolation(self):
+        """Replace w by the Anderson extrapolation of the buffered iterates.
+
+        The extrapolated point is only kept if it decreases the objective.
+        """
+        U = np.diff(self._w_buffer, axis=0)
+        try:
+            z = np.linalg.solve(U @ U.T, np.ones(ANDERSON_K))
+        except np.linalg.LinAlgError:
+            z = None
+        if z is not None and z.sum() != 0:
+            c = z / z.sum()
+            # Xw is linear in w: extrapolate it with the same coefficients
+            w_acc = c @ self._w_buffer[1:]
+            Xw_acc = c @ self._Xw_buffer[1:]
+            if self._primal(w_acc, Xw_acc) < self._primal(self.w, self.Xw):
+                self.w[:] = w_acc
+                self.Xw[:] = Xw_acc
+                self.exp_yXw[:] = np.exp(self.y * self.Xw)
+        self._reset_anderson()
+
+    def _primal(self, w, Xw):
+        return (np.logaddexp(0, -self.y * Xw).sum()
+                + self.lmbd * abs(w).sum())
+
+    def _run_kernel(self, features, L, n_epochs):
+        if self.selection == 'greedy_sweep':
+            if sparse.issparse(self.X):
+                n_heap_swaps, n_updates = self.greedy_sweep_sparse_cd(
+                    self.X.data, self.X.indices, self.X.indptr, self.y,
+                    self.w, self.Xw, self.exp_yXw, self.lmbd, L, features,
+                    n_epochs, self.newton_step
+                )
+            else:
+                n_heap_swaps, n_updates = self.greedy_sweep_cd(
+                    self.X, self.y, self.w, self.Xw, self.exp_yXw, self.lmbd,
+                    L, features, n_epochs, self.newton_step
+                )
+            self.n_heap_swaps += n_heap_swaps
+            self.n_updates += n_updates
+        elif self.parallel:
+            # as many concurrent updates as threads
+            block_size = get_num_threads()
+            # the blocks of each call differ, and are reproducible from the
+            # seed of run
+            seed = self._rng.integers(2 ** 31)
+            if sparse.issparse(self.X):
+                self.parallel_sparse_cd(
+                    self.X.data, self.X.indices, self.X.indptr, self.y,
+                    self.w, self.Xw, self.exp_yXw, self.lmbd, L, features,
+                    n_epochs, self.newton_step, block_size, seed
+                )
+            else:
+                self.parallel_cd(
+                    self.X, self.y, self.w, self.Xw, self.exp_yXw, self.lmbd,
+                    L, features, n_epochs, self.newton_step, block_size, seed
+                )
+        elif sparse.issparse(self.X):
+            self.sparse_cd(
+                self.X.data, self.X.indices, self.X.indptr, self.y, self.w,
+                self.Xw, self.exp_yXw, self.lmbd, L, features, n_epochs,
+                self.newton_step
             )
         else:
-            self.w = self.cd(
-                self.X, self.y, self.lmbd, L, n_iter, self.newton_step
+            self.cd(
+                self.X, self.y, self.w, self.Xw, self.exp_yXw, self.lmbd, L,
+                features, n_epochs, self.newton_step
             )
 
+    def _get_grad(self, features=None):
+        residual = self.y / (1 + self.exp_yXw)
+        if features is None:
+            return -(self.X.T @ residual)
+        return -(self.X[:, features].T @ residual)
+
+    def _get_kkt_violation(self, grad, features):
+        """KKT violation of the features, grad being restricted to them."""
+        w = self.w[features]
+        violation = np.maximum(abs(grad) - self.lmbd, 0)
+        support = w != 0
+        violation[support] = abs(
+            grad[support] + self.lmbd * np.sign(w[support]))
+        return violation
+
+    def _screen(self, features, L):
+        """Gap Safe screening: drop the features certified to be 0."""
+        grad = self._get_grad()
+        # dual point: the residual y / (1 + exp(y Xw)), rescaled to be
+        # feasible, i.e. to satisfy max |X.T theta| <= lmbd.
+        dual_norm = abs(grad).max()
+        scale = min(1, self.lmbd / dual_norm) if dual_norm > 0 else 1.
+        u = scale / (1 + self.exp_yXw)
+        d_obj = (entr(u) + entr(1 - u)).sum()
+        p_obj = self._primal(self.w, self.Xw)
+        gap = max(p_obj - d_obj, GAP_SAFE_RTOL * p_obj)
+
+        # The dual is 4-strongly concave, so the dual optimum lies in the
+        # ball of radius sqrt(gap / 2) around theta. Note ||X_j|| = 2 L_j^.5
+        radius = np.sqrt(gap / 2)
+        keep = (scale * abs(grad[features]) + 2 * radius * np.sqrt(L[features])
+                >= self.lmbd)
+
+        screened = features[~keep]
+        screened = screened[self.w[screened] != 0]
+        if len(screened) > 0:
+            self.Xw -= self.X[:, screened] @ self.w[screened]
+            self.w[screened] = 0
+            self.exp_yXw[:] = np.exp(self.y * self.Xw)
+            if self.acceleration == 'anderson':
+                # the buffered iterates can be nonzero on screened features
+                self._reset_anderson()
+        return features[keep]
+
+    def _run_working_set(self, features, L, n_iter):
+        """Solve subproblems restricted to the most violating features."""
+        ws_size = min_ws_size = WS_SIZE_INIT
+        prev_violation = np.inf
+        for _ in range(n_iter):
+            violation = self._get_kkt_violation(
+                self._get_grad()[features], features)
+            max_violation = violation.max()
+            if max_violation <= WS_TOL * self.lmbd:
+                break
+            if max_violation >= prev_violation:
+                # no progress with the previous working set: grow it
+                min_ws_size = 2 * ws_size
+            prev_violation = max_violation
+
+            # the support is always kept in the working set
+            support = self.w[features] != 0
+            violation[support] = np.inf
+            ws_size = min(max(min_ws_size, 2 * support.sum()), len(features))
+            ws = features[np.argpartition(-violation, ws_size - 1)[:ws_size]]
+            ws = np.sort(ws)
+
+            for _ in range(0, MAX_INNER_EPOCHS, INNER_CHECK_FREQ):
+                self._run_epochs(ws, L, INNER_CHECK_FREQ)
+                ws_violation = self._get_kkt_violation(
+                    self._get_grad(ws), ws)
+                if ws_violation.max() <= .3 * max_violation:
+                    break
+
     @staticmethod
-    @njit
-    def cd(X, y, lmbd, L, n_iter, newton_step):
-        n_samples, n_features = X.shape
-        Xw = np.zeros_like(y, dtype=X.dtype)
-        w = np.zeros(n_features)
+    @njit(cache=True)
+    def cd(X, y, w, Xw, exp_yXw, lmbd, L, features, n_iter, newton_step):
         for _ in range(n_iter):
-            for j in range(n_features):
+            for j in features:
                 if L[j] == 0.:
                     continue
-                old = w[j]
-                exp_yXw = np.exp(y * Xw)
-                grad_j = 0.
-                for i in range(n_samples):
-                    grad_j += -y[i] * X[i, j] / (1 + exp_yXw[i])
+                diff = _cd_step(
+                    X, y, w, exp_yXw, lmbd, L, j, newton_step) - w[j]
+                if diff != 0:
+                    w[j] += diff
+                    _update_Xw(X, y, Xw, exp_yXw, j, diff)
+        return w
 
-                if newton_step:
-                    step = _newton_step_size(X, exp_yXw, j)
+    @staticmethod
+    @njit(cache=True)
+    def sparse_cd(X_data, X_indices, X_indptr, y, w, Xw, exp_yXw, lmbd, L,
+                  features, n_iter, newton_step):
+        for _ in range(n_iter):
+            for j in features:
+                if L[j] == 0.:
+                    continue
+                diff = _sparse_cd_step(
+                    X_data, X_indices, X_indptr, y, w, exp_yXw, lmbd, L, j,
+                    newton_step) - w[j]
+                if diff != 0:
+                    w[j] += diff
+                    _sparse_update_Xw(
+                        X_data, X_indices, X_indptr, y, Xw, exp_yXw, j, diff)
+        return w
+
+    # Shotgun-style parallel CD: coordinates are drawn in random blocks of
+    # block_size features, from the random seed passed by the solver, and
+    # their updates are computed concurrently from the same Xw. Random
+    # blocks of a wide problem are weakly correlated, but not uncorrelated:
+    # the merged update is only accepted if it decreases the objective,
+    # otherwise the block is updated sequentially.
+
+    @staticmethod
+    @njit(parallel=True, cache=True)
+    def parallel_cd(X, y, w, Xw, exp_yXw, lmbd, L, features, n_iter,
+                    newton_step, block_size, seed):
+        np.random.seed(seed)
+        n_samples = X.shape[0]
+        Xw_new = np.empty(n_samples)
+        diffs = np.empty(block_size)
+        for _ in range(n_iter):
+            order = np.random.permutation(features)
+            for block_start in range(0, len(order), block_size):
+                block = order[block_start:block_start + block_size]
+                n_block = len(block)
+                for k in prange(n_block):
+                    diffs[k] = _cd_step(
+                        X, y, w, exp_yXw, lmbd, L, block[k], newton_step
+                    ) - w[block[k]]
+
+                delta_pen = 0.
+                for k in range(n_block):
+                    j = block[k]
+                    delta_pen += abs(w[j] + diffs[k]) - abs(w[j])
+
+                # merge, each thread handling a disjoint set of samples
+                delta_loss = 0.
+                for i in prange(n_samples):
+                    xw_i = Xw[i]
+                    for k in range(n_block):
+                        xw_i += diffs[k] * X[i, block[k]]
+                    Xw_new[i] = xw_i
+                    delta_loss += (_log1p_exp(-y[i] * xw_i)
+                                   - _log1p_exp(-y[i] * Xw[i]))
+
+                if delta_loss + lmbd * delta_pen <= 0:
+                    for k in range(n_block):
+                        w[block[k]] += diffs[k]
+                    for i in prange(n_samples):
+                        Xw[i] = Xw_new[i]
+                        exp_yXw[i] = math.exp(y[i] * Xw[i])
                 else:
-                    step = 1 / L[j]
+                    for j in block:
+                        diff = _cd_step(
+                            X, y, w, exp_yXw, lmbd, L, j, newton_step) - w[j]
+                        if diff != 0:
+                            w[j] += diff
+                            _update_Xw(X, y, Xw, exp_yXw, j, diff)
+        return w
 
-                w[j] -= grad_j * step
-                w[j] = st(w[j], step * lmbd)
-                diff = w[j] - old
-                if diff != 0:
-                    Xw += diff * X[:, j]
+    @staticmethod
+    @njit(parallel=True, cache=True)
+    def parallel_sparse_cd(X_data, X_indices, X_indptr, y, w, Xw, exp_yXw,
+                           lmbd, L, features, n_iter, newton_step,
+                           block_size, seed):
+        np.random.seed(seed)
+        n_samples = len(y)
+        # samples touched by the block, with their value of Xw before it
+        is_touched = np.zeros(n_samples, dtype=np.bool_)
+        touched = np.empty(n_samples, dtype=np.int64)
+        old_Xw = np.empty(n_samples)
+        diffs = np.empty(block_size)
+        for _ in range(n_iter):
+            order = np.random.permutation(features)
+            for block_start in range(0, len(order), block_size):
+                block = order[block_start:block_start + block_size]
+                n_block = len(block)
+                for k in prange(n_block):
+                    diffs[k] = _sparse_cd_step(
+                        X_data, X_indices, X_indptr, y, w, exp_yXw, lmbd, L,
+                        block[k], newton_step) - w[block[k]]
+
+                delta_pen = 0.
+                n_touched = 0
+                for k in range(n_block):
+                    j = block[k]
+                    delta_pen += abs(w[j] + diffs[k]) - abs(w[j])
+                    if diffs[k] == 0:
+                        continue
+                    for ind in range(X_indptr[j], X_indptr[j + 1]):
+                        i = X_indices[ind]
+                        if not is_touched[i]:
+                            is_touched[i] = True
+                            touched[n_touched] = i
+                            old_Xw[n_touched] = Xw[i]
+                            n_touched += 1
+                        Xw[i] += diffs[k] * X_data[ind]
+
+                delta_loss = 0.
+                for t in prange(n_touched):
+                    y_t = y[touched[t]]
+                    delta_loss += (_log1p_exp(-y_t * Xw[touched[t]])
+                                   - _log1p_exp(-y_t * old_Xw[t]))
+
+                accept = delta_loss + lmbd * delta_pen <= 0
+                for t in prange(n_touched):
+                    is_touched[touched[t]] = False
+                    if accept:
+                        exp_yXw[touched[t]] = math.exp(
+                            y[touched[t]] * Xw[touched[t]])
+                    else:
+                        Xw[touched[t]] = old_Xw[t]
+
+                if accept:
+                    for k in range(n_block):
+                        w[block[k]] += diffs[k]
+                else:
+                    for j in block:
+                        diff = _sparse_cd_step(
+                            X_data, X_indices, X_indptr, y, w, exp_yXw, lmbd,
+                            L, j, newton_step) - w[j]
+                        if diff != 0:
+                            w[j] += diff
+                            _sparse_update_Xw(
+                                X_data, X_indices, X_indptr, y, Xw, exp_yXw,
+                                j, diff)
         return w
 
+    # Greedy sweeps, an approximation of Gauss-Southwell selection. The
+    # priority of a coordinate is the size of its prox-gradient step, and
+    # Gauss-Southwell would update the largest one each time, which needs
+    # the gradient of all the features after each update. Here, priorities
+    # are computed for all the features at the beginning of each epoch, and
+    # the epoch visits the features that would move at most once each, in
+    # decreasing order of priority, from a max-heap. When a popped
+    # coordinate turns out to be stale, i.e. its fresh priority is lower
+    # than the next one, it is pushed back once with its fresh priority. An
+    # epoch costs about the gradients of a cyclic epoch, plus O(log p) heap
+    # swaps per update: only the order of the updates is greedy.
+
     @staticmethod
-    @njit
-    def sparse_cd(X_data, X_indices, X_indptr, y, lmbd, L, n_iter,
-                  newton_step):
-        n_features = len(X_indptr) - 1
-        Xw = np.zeros_like(y)
-        exp_yXw = np.zeros_like(y)
-        w = np.zeros(n_features)
+    @njit(cache=True)
+    def greedy_sweep_cd(X, y, w, Xw, exp_yXw, lmbd, L, features, n_iter,
+                        newton_step):
+        priorities = np.empty(len(features))
+        heap = np.empty(len(features), dtype=np.int64)
+        is_refreshed = np.zeros(X.shape[1], dtype=np.bool_)
+        n_swaps, n_updates = 0, 0
         for _ in range(n_iter):
-            for j in range(n_features):
-                if L[j] == 0.:
+            size = 0
+            for j in features:
+                priority = abs(
+                    _cd_step(X, y, w, exp_yXw, lmbd, L, j, False) - w[j])
+                if priority > 0:
+                    priorities[size], heap[size] = priority, j
+                    is_refreshed[j] = False
+                    size += 1
+            n_swaps += _heapify(priorities, heap, size)
+
+            while size > 0:
+                j = heap[0]
+                n_swaps += _heap_pop(priorities, heap, size)
+                size -= 1
+                new_w_j = _cd_step(X, y, w, exp_yXw, lmbd, L, j, False)
+                if (not is_refreshed[j] and size > 0
+                        and abs(new_w_j - w[j]) < priorities[0]):
+                    is_refreshed[j] = True
+                    n_swaps += _heap_push(
+                        priorities, heap, size, abs(new_w_j - w[j]), j)
+                    size += 1
                     continue
-                old = w[j]
-                start, end = X_indptr[j:j+2]
-                grad_j = 0.
-                for ind in range(start, end):
-                    i = X_indices[ind]
-                    exp_yXw[i] = math.exp(y[i] * Xw[i])
-                    grad_j += -y[i] * X_data[ind] / (1 + exp_yXw[i])
 
                 if newton_step:
-                    step = _newton_step_size_sparse(
-                        X_data, X_indices, X_indptr, exp_yXw, j)
-                else:
-                    step = 1 / L[j]
+                    new_w_j = _cd_step(X, y, w, exp_yXw, lmbd, L, j, True)
+                diff = new_w_j - w[j]
+                if diff != 0:
+                    w[j] += diff
+                    _update_Xw(X, y, Xw, exp_yXw, j, diff)
+                    n_updates += 1
+        return n_swaps, n_updates
+
+    @staticmethod
+    @njit(cache=True)
+    def greedy_sweep_sparse_cd(X_data, X_indices, X_indptr, y, w, Xw,
+                               exp_yXw, lmbd, L, features, n_iter,
+                               newton_step):
+        priorities = np.empty(len(features))
+        heap = np.empty(len(features), dtype=np.int64)
+        is_refreshed = np.zeros(len(X_indptr) - 1, dtype=np.bool_)
+        n_swaps, n_updates = 0, 0
+        for _ in range(n_iter):
+            size = 0
+            for j in features:
+                priority = abs(_sparse_cd_step(
+                    X_data, X_indices, X_indptr, y, w, exp_yXw, lmbd, L, j,
+                    False) - w[j])
+                if priority > 0:
+                    priorities[size], heap[size] = priority, j
+                    is_refreshed[j] = False
+                    size += 1
+            n_swaps += _heapify(priorities, heap, size)
 
-                w[j] -= grad_j * step
-                w[j] = st(w[j], step * lmbd)
-                diff = w[j] - old
+            while size > 0:
+                j = heap[0]
+                n_swaps += _heap_pop(priorities, heap, size)
+                size -= 1
+                new_w_j = _sparse_cd_step(
+                    X_data, X_indices, X_indptr, y, w, exp_yXw, lmbd, L, j,
+                    False)
+                if (not is_refreshed[j] and size > 0
+                        and abs(new_w_j - w[j]) < priorities[0]):
+                    is_refreshed[j] = True
+                    n_swaps += _heap_push(
+                        priorities, heap, size, abs(new_w_j - w[j]), j)
+                    size += 1
+                    continue
 
-                diff = w[j] - old
+                if newton_step:
+                    new_w_j = _sparse_cd_step(
+                        X_data, X_indices, X_indptr, y, w, exp_yXw, lmbd, L,
+                        j, True)
+                diff = new_w_j - w[j]
                 if diff != 0:
-                    for ind in range(start, end):
-                        Xw[X_indices[ind]] += diff * X_data[ind]
-        return w
+                    w[j] += diff
+                    _sparse_update_Xw(
+                        X_data, X_indices, X_indptr, y, Xw, exp_yXw, j, diff)
+                    n_updates += 1
+        return n_swaps, n_updates
 
     def get_result(self):
+        if self.is_path:
+            return dict(beta=np.array(self.coefs))
         return dict(beta=self.w)
+
+
+if __name__ == '__main__':
+    precompile()
@@ -1,37 +1,82 @@
 import warnings
 
 from benchopt import BaseSolver, safe_import_context
+from benchmark_utils.warm_start import WarmStartMixin
+from benchmark_utils.instrumentation import instrument, phase
 
 
 with safe_import_context() as import_ctx:
+    import numpy as np
     from celer import LogisticRegression
+    from benchmark_utils.layouts import get_layout
     from sklearn.exceptions import ConvergenceWarning
 
 
-class Solver(BaseSolver):
+@instrument
+class Solver(WarmStartMixin, BaseSolver):
     name = 'Celer'
     stopping_strategy = 'iteration'
 
     install_cmd = 'conda'
     # need 0.7dev until max_iter=0 is supported on pypi version (0.7 release)
     requirements = ['pip:git+https://github.com/mathurinm/celer.git']
+    X_layout = 'column'
+    # the working set grows again from p0 features at each resumed run
+    exact_resume = False
 
-    def set_objective(self, X, y, lmbd):
-        self.X, self.y, self.lmbd = X, y, lmbd
+    parameters = {
+        'warm_start': [False],
+    }
+
+    def skip(self, X, y, lmbd, stats):
+        if self.warm_start and np.ndim(lmbd) > 0:
+            return True, "resumed runs are not supported on paths"
+        return False, None
+
+    def set_objective(self, X, y, lmbd, stats):
+        with phase('data_conversion'):
+            X = get_layout(X, self.X_layout)
+        self.X, self.y = X, y
+        # a single regularization value, or a path solved with warm starts
+        self.is_path = np.ndim(lmbd) > 0
+        self.lmbd_path = np.atleast_1d(lmbd)
 
         warnings.filterwarnings('ignore', category=ConvergenceWarning)
+        self._init_warm_start()
+
+    def _cold_start(self):
         self.clf = LogisticRegression(
-            penalty='l1', C=1/self.lmbd, max_iter=1,
+            penalty='l1', C=1/self.lmbd_path[0], max_iter=1,
             max_epochs=100000, p0=10, verbose=False, tol=1e-12,
-            fit_intercept=False
+            fit_intercept=False, warm_start=self.warm_start or self.is_path
         )
 
-    def run(self, n_iter):
+    def _run_iter(self, n_iter):
         self.clf.max_iter = n_iter
         self.clf.fit(self.X, self.y)
 
+    def run(self, n_iter):
+        if self.warm_start:
+            # n_iter is benchopt's callback, see WarmStartMixin
+            self._run_resumed(n_iter)
+            return
+
+        if not self.is_path:
+            self._run_iter(n_iter)
+            return
+
+        self._cold_start()
+        self.clf.max_iter = n_iter
+        self.coefs = []
+        for lmbd in self.lmbd_path:
+            self.clf.C = 1 / lmbd
+            self.clf.fit(self.X, self.y)
+            self.coefs.append(self.clf.coef_.flatten())
+
     def get_next(self, stop_val):
         return stop_val + 1
 
     def get_result(self):
+        if self.is_path:
+            return dict(beta=np.array(self.coefs))
         return dict(beta=self.clf.coef_.flatten())
@@ -1,5 +1,6 @@
 import warnings
 from benchopt import BaseSolver, safe_import_context
+from benchmark_utils.instrumentation import instrument, phase
 
 
 with safe_import_context() as import_ctx:
@@ -7,21 +8,33 @@ with safe_import_context() as import_ctx:
     import copt as cp
     import copt.loss
     import copt.penalty
+    from benchmark_utils.layouts import get_layout
 
 
+# Iteration budget of the single pass mode: the run is stopped by benchopt's
+# callback long before.
+SINGLE_PASS_MAX_ITER = 100_000
+
+
+@instrument
 class Solver(BaseSolver):
     name = 'copt'
 
     install_cmd = 'conda'
     requirements = ['pip:https://github.com/openopt/copt/archive/master.zip']
+    # stochastic solvers access X by rows
+    X_layout = 'row'
 
     parameters = {
         'accelerated': [False, True],
         'line_search': [False, True],
         'solver': ['pgd', 'svrg', 'saga'],
+        # Run once, with benchopt's callback recording the iterates along
+        # the way, instead of restarting from zero for each n_iter.
+        'single_pass': [False],
     }
 
-    def skip(self, X, y, lmbd):
+    def skip(self, X, y, lmbd, stats):
         if (X.shape[1] > 50_000) and self.solver not in ['svrg', 'saga']:
             return True, (
                 f"problem too large (n_features={X.shape[1]} > 50000) "
@@ -39,49 +52,80 @@ class Solver(BaseSolver):
                 f"accelerated or line_search is not available for "
                 f"{self.solver}"
             )
+        if np.ndim(lmbd) > 0:
+            return True, "regularization paths are not supported"
 
         return False, None
 
-    def set_objective(self, X, y, lmbd):
-        y = (y > 0).astype(np.float64)
+    def set_objective(self, X, y, lmbd, stats):
+        with phase('data_conversion'):
+            y = (y > 0).astype(np.float64)
+            X = get_layout(X, self.X_layout)
         self.X, self.y, self.lmbd = X, y, lmbd
 
+        # Lipschitz constants of copt's LogLoss, which is averaged over the
+        # samples, from the cached statistics instead of copt's properties
+        # that recompute them at each access.
+        self.lipschitz = stats.squared_spectral_norm / (4 * X.shape[0])
+        self.max_lipschitz = stats.squared_row_norms.max() / 4
+
+        # the loss and the penalty are the same for all the runs
+        self.f = cp.loss.LogLoss(X, y)
+        self.g = cp.penalty.L1Norm(self.lmbd / X.shape[0])
+        warnings.filterwarnings('ignore', category=RuntimeWarning)
+
+        # benchopt then calls run(callback) once, and the callback evaluates
+        # the iterates at increasingly spaced iterations, not timing it.
+        if self.single_pass:
+            self.stopping_strategy = 'callback'
+
         # Make sure we cache the numba compilation.
         if self.solver in ['svrg', 'saga']:
-            self.run(1)
+            with phase('jit_warmup'):
+                self._minimize(1)
 
     def run(self, n_iter):
-        X, y, solver = self.X, self.y, self.solver
-        n_features = X.shape[1]
+        if self.single_pass:
+            callback = n_iter
 
-        x0 = np.zeros(n_features)
-        if n_iter == 0:
-            self.beta = x0
+            def copt_callback(kw):
+                # copt stops when its callback returns False, like benchopt
+                self.beta = kw['x']
+                return callback()
+
+            self._minimize(SINGLE_PASS_MAX_ITER, copt_callback)
             return
 
-        f = cp.loss.LogLoss(X, y)
-        g = cp.penalty.L1Norm(self.lmbd / X.shape[0])
+        if n_iter == 0:
+            self.beta = np.zeros(self.X.shape[1])
+            return
+        self.beta = self._minimize(n_iter).x
 
-        warnings.filterwarnings('ignore', category=RuntimeWarning)
+    def _minimize(self, max_iter, callback=None):
+        X, y, solver = self.X, self.y, self.solver
+        f, g = self.f, self.g
+        n_features = X.shape[1]
+        x0 = np.zeros(n_features)
 
         if solver == 'pgd':
             if self.line_search:
                 step = 'backtracking'
             else:
                 def step(x):
-                    return 1.0 / f.lipschitz
+                    return 1.0 / self.lipschitz
             result = cp.minimize_proximal_gradient(
                 f.f_grad,
                 x0,
                 g.prox,
                 step=step,
                 tol=0,
-                max_iter=n_iter,
+                max_iter=max_iter,
+                callback=callback,
                 jac=True,
                 accelerated=self.accelerated,
             )
         elif solver == 'saga':
-            step_size = 1.0 / (3 * f.max_lipschitz)
+            step_size = 1.0 / (3 * self.max_lipschitz)
             result = cp.minimize_saga(
                 f.partial_deriv,
                 X,
@@ -90,11 +134,12 @@ class Solver(BaseSolver):
                 prox=g.prox_factory(n_features),
                 step_size=step_size,
                 tol=0,
-                max_iter=n_iter,
+                max_iter=max_iter,
+                callback=callback,
             )
         else:
             assert solver == 'svrg'
-            step_size = 1.0 / (3 * f.max_lipschitz)
+            step_size = 1.0 / (3 * self.max_lipschitz)
             result = cp.minimize_svrg(
                 f.partial_deriv,
                 X,
@@ -103,10 +148,11 @@ class Solver(BaseSolver):
                 prox=g.prox_factory(n_features),
                 step_size=step_size,
                 tol=0,
-                max_iter=n_iter,
+                max_iter=max_iter,
+                callback=callback,
             )
 
-        self.beta = result.x
+        return result
 
     def get_result(self):
         return dict(beta=self.beta.flatten())
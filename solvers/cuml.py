@@ -1,5 +1,6 @@
 from benchopt import BaseSolver, safe_import_context
-from benchopt.utils.sys_info import get_cuda_version
+from benchmark_utils.hardware import check_installed, get_cuda_version
+from benchmark_utils.instrumentation import instrument, phase
 
 cuda_version = get_cuda_version()
 if cuda_version is not None:
@@ -9,13 +10,14 @@ with safe_import_context() as import_ctx:
     if cuda_version is None:
         raise ImportError("cuml solver needs a nvidia GPU.")
 
-    import cudf
+    import numpy as np
     from scipy import sparse
 
-    import cupyx.scipy.sparse as cusparse
-    from cuml.linear_model import LogisticRegression
+    # cudf, cupyx and cuml are imported in set_objective
+    check_installed('cudf', 'cupyx', 'cuml')
 
 
+@instrument
 class Solver(BaseSolver):
     name = "cuml"
 
@@ -44,18 +46,29 @@ class Solver(BaseSolver):
 
     parameter_template = "{solver}"
 
-    def set_objective(self, X, y, lmbd):
+    def skip(self, X, y, lmbd, stats):
+        if np.ndim(lmbd) > 0:
+            return True, "regularization paths are not supported"
+        return False, None
+
+    def set_objective(self, X, y, lmbd, stats):
+        import cudf
+        import cupyx.scipy.sparse as cusparse
+        from cuml.linear_model import LogisticRegression
+
         self.X, self.y, self.lmbd = X, y, lmbd
-        if sparse.issparse(X):
-            if sparse.isspmatrix_csc(X):
-                self.X = cusparse.csc_matrix(X)
-            elif sparse.isspmatrix_csr(X):
-                self.X = cusparse.csr_matrix(X)
+        # copies of the data on the GPU
+        with phase('data_conversion'):
+            if sparse.issparse(X):
+                if sparse.isspmatrix_csc(X):
+                    self.X = cusparse.csc_matrix(X)
+                elif sparse.isspmatrix_csr(X):
+                    self.X = cusparse.csr_matrix(X)
+                else:
+                    raise ValueError("Non suported sparse format")
             else:
-                raise ValueError("Non suported sparse format")
-        else:
-            self.X = cudf.DataFrame(self.X)
-        self.y = cudf.Series((self.y > 0))
+                self.X = cudf.DataFrame(self.X)
+            self.y = cudf.Series((self.y > 0))
 
         self.clf = LogisticRegression(
             fit_intercept=False,
@@ -1,26 +1,66 @@
 from benchopt import BaseSolver, safe_import_context
+from benchmark_utils.hardware import check_installed
+from benchmark_utils.instrumentation import instrument, phase
+from benchmark_utils.warm_start import WarmStartMixin
 
 
 with safe_import_context() as import_ctx:
-    import cvxpy as cp
-    # Hack cvxpy to be able to retrieve a suboptimal solution when
-    # reaching max_iter
-    cp.reductions.solvers.conic_solvers.ECOS.STATUS_MAP[-1] = \
-        'optimal_inaccurate'
+    import numpy as np
+    # cvxpy is imported in skip and set_objective
+    check_installed('cvxpy')
 
 
-class Solver(BaseSolver):
+# Name of the iteration limit of the conic solvers, in cvxpy.
+MAX_ITER_ARG = {'ECOS': 'max_iters', 'SCS': 'max_iters',
+                'CLARABEL': 'max_iter'}
+# Conic solvers which can start from the previous solution.
+WARM_START_BACKENDS = ('SCS',)
+
+
+@instrument
+class Solver(WarmStartMixin, BaseSolver):
     name = 'cvxpy'
 
     install_cmd = 'conda'
     requirements = ['cvxpy']
+    # SCS adapts its step sizes again at each resumed run
+    exact_resume = False
+
+    parameters = {
+        # one of MAX_ITER_ARG
+        'backend': ['ECOS'],
+        'warm_start': [False],
+    }
 
-    def set_objective(self, X, y, lmbd):
+    def skip(self, X, y, lmbd, stats):
+        import cvxpy as cp
 
-        self.X, self.y, self.lmbd = X, y, lmbd
+        if self.backend not in cp.installed_solvers():
+            return True, f"{self.backend} is not installed"
+        if self.warm_start and self.backend not in WARM_START_BACKENDS:
+            return True, f"{self.backend} does not support warm start"
+        if self.warm_start and np.ndim(lmbd) > 0:
+            return True, "resumed runs are not supported on paths"
+        return False, None
+
+    def set_objective(self, X, y, lmbd, stats):
+        import cvxpy as cp
+        # Hack cvxpy to be able to retrieve a suboptimal solution when
+        # reaching max_iter
+        cp.reductions.solvers.conic_solvers.ECOS.STATUS_MAP[-1] = \
+            'optimal_inaccurate'
+
+        self.X, self.y = X, y
+        # a single regularization value, or a path solved with warm starts
+        self.is_path = np.ndim(lmbd) > 0
+        self.lmbd_path = np.atleast_1d(lmbd)
 
         n_features = self.X.shape[1]
         self.beta = cp.Variable(n_features)
+        # lmbd is a parameter multiplying a parameter-free expression: the
+        # problem follows the DPP rules, so its canonicalization is computed
+        # once and reused for all the values of lmbd.
+        self.lmbd = cp.Parameter(nonneg=True, value=self.lmbd_path[0])
 
         loss = cp.sum(
             cp.logistic(-cp.multiply(self.y, cp.matmul(self.X, self.beta)))
@@ -28,8 +68,43 @@ class Solver(BaseSolver):
         self.problem = cp.Problem(cp.Minimize(
             loss + self.lmbd * cp.norm(self.beta, 1)))
 
+        # Canonicalize here, so that runs only time the conic solver.
+        with phase('canonicalization'):
+            self.problem.get_problem_data(solver=self.backend)
+
+        self._init_warm_start()
+
+    def _cold_start(self):
+        self._resume = False
+
+    def _run_iter(self, n_iter):
+        self.coefs = []
+        for k, lmbd in enumerate(self.lmbd_path):
+            # along a path, each problem starts from the previous solution
+            self.lmbd.value = lmbd
+            self.problem.solve(
+                solver=self.backend, warm_start=self._resume or k > 0,
+                verbose=False, **{MAX_ITER_ARG[self.backend]: n_iter}
+            )
+            self.coefs.append(self._get_beta())
+        self._resume = self.warm_start
+
     def run(self, n_iter):
-        self.problem.solve(max_iters=n_iter, verbose=False)
+        if self.warm_start:
+            # n_iter is benchopt's callback, see WarmStartMixin
+            self._run_resumed(n_iter)
+            return
+
+        self._run_iter(n_iter)
+
+    def _get_beta(self):
+        # no solution is returned when the iteration limit is reached
+        # before a feasible enough point, e.g. by Clarabel
+        if self.beta.value is None:
+            return np.zeros(self.X.shape[1])
+        return self.beta.value.copy()
 
     def get_result(self):
-        return dict(beta=self.beta.value)
+        if self.is_path:
+            return dict(beta=np.array(self.coefs))
+        return dict(beta=self.coefs[0])
@@ -1,22 +1,30 @@
 from benchopt import BaseSolver, safe_import_context
+from benchmark_utils.instrumentation import instrument, phase
 
 
 with safe_import_context() as import_ctx:
-    import scipy
+    import numpy as np
     from cyanure import BinaryClassifier
+    from benchmark_utils.layouts import get_layout
 
 
+@instrument
 class Solver(BaseSolver):
     name = 'Cyanure'
 
     install_cmd = 'conda'
     requirements = ['mkl', 'pip:cyanure-mkl']
+    X_layout = 'row'
 
-    def set_objective(self, X, y, lmbd):
+    def skip(self, X, y, lmbd, stats):
+        if np.ndim(lmbd) > 0:
+            return True, "regularization paths are not supported"
+        return False, None
+
+    def set_objective(self, X, y, lmbd, stats):
+        with phase('data_conversion'):
+            X = get_layout(X, self.X_layout)
         self.X, self.y, self.lmbd = X, y, lmbd
-        if (scipy.sparse.issparse(self.X) and
-                scipy.sparse.isspmatrix_csc(self.X)):
-            self.X = scipy.sparse.csr_matrix(self.X)
 
         self.solver = BinaryClassifier(loss='logistic', penalty='l1',
                                        fit_intercept=False)
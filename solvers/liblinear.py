@@ -1,41 +1,86 @@
 from benchopt import safe_import_context
 from benchopt.base import CommandLineSolver
 from benchopt.helpers.shell import import_shell_cmd
+from benchmark_utils.instrumentation import instrument, phase
 
 with safe_import_context() as import_ctx:
+    import os
+    import numpy as np
     import pandas as pd
+    from scipy import sparse
+    from benchmark_utils.cache import get_cache_dir
+    from benchmark_utils.layouts import get_layout
     train_cmd = import_shell_cmd('train')
 
 
+def dump_libsvm(X, y, filename, chunk_size=10_000):
+    """Write (X, y) in libsvm format, with only the nonzero entries of X.
+
+    Rows are formatted by chunks of ``chunk_size``, with vectorized string
+    operations on the CSR arrays of the chunk.
+    """
+    n_samples = X.shape[0]
+    labels = np.where(y > 0, '+1', '-1')
+    with open(filename, 'w', buffering=1 << 22) as f:
+        for start in range(0, n_samples, chunk_size):
+            stop = min(start + chunk_size, n_samples)
+            # dense chunks are converted one at a time
+            chunk = sparse.csr_matrix(X[start:stop])
+            chunk.sort_indices()
+            entries = np.char.add(
+                np.char.add((chunk.indices + 1).astype(str), ':'),
+                np.char.mod('%.12g', chunk.data)
+            ).tolist()
+            indptr = chunk.indptr
+            f.write("".join([
+                f"{labels[start + i]} "
+                f"{' '.join(entries[indptr[i]:indptr[i + 1]])}\n"
+                for i in range(stop - start)
+            ]))
+
+
+@instrument
 class Solver(CommandLineSolver):
     name = 'Liblinear'
     stopping_strategy = 'tolerance'
 
     install_cmd = 'shell'
     install_script = 'install_liblinear.sh'
+    X_layout = 'row'
 
-    def set_objective(self, X, y, lmbd):
+    def skip(self, X, y, lmbd, stats):
+        if np.ndim(lmbd) > 0:
+            return True, "regularization paths are not supported"
+        return False, None
+
+    def set_objective(self, X, y, lmbd, stats):
 
         # The regularization parameter is passed directly to the command line
         # so we store it for latter.
         self.lmbd = lmbd
+        self.n_features = X.shape[1]
 
-        # Dump the large arrays to a file and store its name
-        n_samples = X.shape[0]
-        with open(self.data_filename, 'w') as f:
-            for i in range(n_samples):
-                line = f"{'+1' if y[i] > 0 else '-1'} "
-                line += " ".join([f"{c[0] + 1}:{c[1]:.12f}"
-                                  for c in enumerate(X[i])])
-                line += "\n"
-
-                f.write(line)
+        # Dump the large arrays to a file, shared by all the runs on the same
+        # data, and store its name.
+        self.libsvm_filename = (
+            get_cache_dir("liblinear") / f"{stats.data_hash}.txt"
+        )
+        if not self.libsvm_filename.exists():
+            tmp_filename = self.libsvm_filename.with_suffix(
+                f".{os.getpid()}.tmp")
+            with phase('data_conversion'):
+                dump_libsvm(get_layout(X, self.X_layout), y, tmp_filename)
+            os.replace(tmp_filename, self.libsvm_filename)
 
     def run(self, tolerance):
         train_cmd(f"-q -s 6 -B -1 -c {1 / self.lmbd} "
-                  f"-e {tolerance} {self.data_filename} "
+                  f"-e {tolerance} {self.libsvm_filename} "
                   f"{self.model_filename}")
 
     def get_result(self):
         df = pd.read_csv(self.model_filename, header=5)
-        return dict(beta=df.w.to_numpy())
+        # liblinear only stores weights up to the last nonzero feature index
+        # present in the data.
+        beta = np.zeros(self.n_features)
+        beta[:len(df)] = df.w.to_numpy()
+        return dict(beta=beta)
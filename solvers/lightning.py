@@ -1,29 +1,58 @@
 from benchopt import BaseSolver, safe_import_context
+from benchmark_utils.warm_start import WarmStartMixin
+from benchmark_utils.instrumentation import instrument, phase
 
 
 with safe_import_context() as import_ctx:
+    import numpy as np
     from lightning.classification import CDClassifier
+    from benchmark_utils.layouts import get_layout
 
 
-class Solver(BaseSolver):
+@instrument
+class Solver(WarmStartMixin, BaseSolver):
     name = 'Lightning'
 
     install_cmd = 'conda'
     requirements = [
         'pip:git+https://github.com/scikit-learn-contrib/lightning.git'
     ]
+    X_layout = 'column'
 
-    def set_objective(self, X, y, lmbd):
+    parameters = {
+        'warm_start': [False],
+    }
 
+    def skip(self, X, y, lmbd, stats):
+        if np.ndim(lmbd) > 0:
+            return True, "regularization paths are not supported"
+        return False, None
+
+    def set_objective(self, X, y, lmbd, stats):
+
+        with phase('data_conversion'):
+            X = get_layout(X, self.X_layout)
         self.X, self.y, self.lmbd = X, y, lmbd
 
+        self._init_warm_start()
+
+    def _cold_start(self):
         self.clf = CDClassifier(
             loss='log', penalty='l1', C=1, alpha=self.lmbd,
-            tol=0, permute=False, shrinking=False, warm_start=False)
+            tol=0, permute=False, shrinking=False,
+            warm_start=self.warm_start)
 
-    def run(self, n_iter):
+    def _run_iter(self, n_iter):
         self.clf.max_iter = n_iter
         self.clf.fit(self.X, self.y)
 
+    def run(self, n_iter):
+        if self.warm_start:
+            # n_iter is benchopt's callback, see WarmStartMixin
+            self._run_resumed(n_iter)
+            return
+
+        self._run_iter(n_iter)
+
     def get_result(self):
         return dict(beta=self.clf.coef_.flatten())
@@ -0,0 +1,169 @@
+from benchopt import BaseSolver
+from benchopt import safe_import_context
+from benchmark_utils.instrumentation import instrument, phase
+
+with safe_import_context() as import_ctx:
+    import math
+    import numpy as np
+    from scipy import sparse
+    from numba import njit, prange
+    from benchmark_utils.layouts import get_layout, make_tiny_problem
+
+
+if import_ctx.failed_import:
+
+    def njit(*args, **kwargs):  # noqa: F811
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+
+@njit(parallel=True, cache=True)
+def _compressed_matvec(X_data, X_indices, X_indptr, x, out):
+    # Computes X @ x for CSR arrays, and X.T @ x for CSC arrays: each thread
+    # handles its own rows of the result, no synchronization is needed.
+    for i in prange(len(X_indptr) - 1):
+        acc = 0.
+        for ind in range(X_indptr[i], X_indptr[i + 1]):
+            acc += X_data[ind] * x[X_indices[ind]]
+        out[i] = acc
+
+
+@njit(parallel=True, cache=True)
+def _loss_and_residual(y, Xw, residual):
+    # Returns sum_i log(1 + exp(-y_i Xw_i)) and stores its gradient wrt Xw
+    # in residual.
+    loss = 0.
+    for i in prange(len(y)):
+        y_Xw_i = y[i] * Xw[i]
+        if y_Xw_i < 0:
+            loss += -y_Xw_i + math.log1p(math.exp(y_Xw_i))
+        else:
+            loss += math.log1p(math.exp(-y_Xw_i))
+        residual[i] = -y[i] / (1 + math.exp(y_Xw_i))
+    return loss
+
+
+def st(x, mu):
+    return np.sign(x) * np.maximum(abs(x) - mu, 0)
+
+
+@instrument
+class Solver(BaseSolver):
+    name = "PGD"
+
+    install_cmd = 'conda'
+    requirements = ['numba']
+
+    parameters = {
+        'algorithm': ['ista', 'fista', 'restart_fista'],
+        'backtracking': [False, True],
+    }
+    references = [
+        'A. Beck and M. Teboulle, "A fast iterative shrinkage-thresholding '
+        'algorithm for linear inverse problems", SIAM J. Imaging Sci. (2009)',
+        'B. O\'Donoghue and E. Candès, "Adaptive restart for accelerated '
+        'gradient schemes", Found. Comput. Math. (2015)'
+    ]
+
+    def skip(self, X, y, lmbd, stats):
+        if np.ndim(lmbd) > 0:
+            return True, "regularization paths are not supported"
+        return False, None
+
+    def set_objective(self, X, y, lmbd, stats):
+        self.y, self.lmbd = y, lmbd
+
+        if sparse.issparse(X):
+            # CSR rows give X @ w and CSC columns give X.T @ r, both with
+            # one thread per entry of the result.
+            self.X = None
+            with phase('data_conversion'):
+                self.X_csr = get_layout(X, 'row')
+                self.X_csc = get_layout(X, 'column')
+        else:
+            self.X, self.X_csr, self.X_csc = X, None, None
+        self.n_samples, self.n_features = X.shape
+        self.lipschitz = stats.squared_spectral_norm / 4
+
+        with phase('jit_warmup'):
+            self._warm_up()
+
+    def _warm_up(self):
+        """Compile the kernels on a tiny problem like (X, y)."""
+        X = self.X_csr if self.X is None else self.X
+        _, y = make_tiny_problem(X, self.y)
+        _loss_and_residual(y, np.zeros(len(y)), np.empty(len(y)))
+        if self.X is not None:
+            return
+        for X in (self.X_csr, self.X_csc):
+            X, _ = make_tiny_problem(X, self.y)
+            # x is indexed by the columns of CSR and the rows of CSC arrays
+            n_in = X.shape[1] if X.format == 'csr' else X.shape[0]
+            _compressed_matvec(X.data, X.indices, X.indptr, np.zeros(n_in),
+                               np.empty(len(X.indptr) - 1))
+
+    def _matvec(self, w):
+        if self.X is not None:
+            return self.X @ w
+        out = np.empty(self.n_samples)
+        _compressed_matvec(
+            self.X_csr.data, self.X_csr.indices, self.X_csr.indptr, w, out)
+        return out
+
+    def _rmatvec(self, r):
+        if self.X is not None:
+            return self.X.T @ r
+        out = np.empty(self.n_features)
+        _compressed_matvec(
+            self.X_csc.data, self.X_csc.indices, self.X_csc.indptr, r, out)
+        return out
+
+    def _f_grad(self, w):
+        residual = np.empty(self.n_samples)
+        loss = _loss_and_residual(self.y, self._matvec(w), residual)
+        return loss, self._rmatvec(residual)
+
+    def run(self, n_iter):
+        lmbd = self.lmbd
+        w = np.zeros(self.n_features)
+        z, t = w.copy(), 1.
+        step = 1 / self.lipschitz
+        if self.backtracking:
+            # start from the curvature along the first gradient, a lower
+            # bound on the Lipschitz constant; the step then only decreases.
+            _, grad = self._f_grad(w)
+            curvature = np.linalg.norm(self._matvec(grad)) ** 2 / 4
+            if curvature > 0:
+                step = np.linalg.norm(grad) ** 2 / curvature
+
+        for _ in range(n_iter):
+            f_z, grad = self._f_grad(z)
+            w_new = st(z - step * grad, step * lmbd)
+            if self.backtracking:
+                residual = np.empty(self.n_samples)
+                while True:
+                    diff = w_new - z
+                    f_new = _loss_and_residual(
+                        self.y, self._matvec(w_new), residual)
+                    if f_new <= f_z + grad @ diff + diff @ diff / (2 * step):
+                        break
+                    step /= 2
+                    w_new = st(z - step * grad, step * lmbd)
+
+            if self.algorithm == 'ista':
+                z = w_new
+            else:
+                t_new = (1 + np.sqrt(1 + 4 * t ** 2)) / 2
+                if (self.algorithm == 'restart_fista'
+                        and (z - w_new) @ (w_new - w) > 0):
+                    # the momentum goes against the gradient step: restart
+                    z, t_new = w_new, 1.
+                else:
+                    z = w_new + (t - 1) / t_new * (w_new - w)
+                t = t_new
+            w = w_new
+        self.w = w
+
+    def get_result(self):
+        return dict(beta=self.w)
@@ -1,23 +1,31 @@
 from benchopt import BaseSolver
 from benchopt import safe_import_context
+from benchmark_utils.warm_start import WarmStartMixin
+from benchmark_utils.instrumentation import instrument, phase
 
 with safe_import_context() as import_ctx:
     import warnings
+    import numpy as np
     from skglm.penalties import L1
     from skglm.datafits import Logistic
     from skglm.solvers import ProxNewton
     from skglm.estimators import GeneralizedLinearEstimator
     from sklearn.exceptions import ConvergenceWarning
+    from benchmark_utils.layouts import get_layout
 
 
-class Solver(BaseSolver):
+@instrument
+class Solver(WarmStartMixin, BaseSolver):
     name = "skglm"
     stopping_strategy = "iteration"
 
     install_cmd = 'conda'
     requirements = [
-        'pip:skglm>=0.2',
+        'pip:skglm>=0.3',
     ]
+    X_layout = 'column'
+    # the working set is rebuilt at each resumed run
+    exact_resume = False
     references = [
         'Q. Bertrand and Q. Klopfenstein and P.-A. Bannier and G. Gidel'
         'and M. Massias'
@@ -25,26 +33,67 @@ class Solver(BaseSolver):
         'https://arxiv.org/abs/2204.07826'
     ]
 
-    def set_objective(self, X, y, lmbd):
-        self.X, self.y, self.lmbd = X, y, lmbd
-        n_samples = self.X.shape[0]
+    parameters = {
+        'warm_start': [False],
+    }
+
+    def skip(self, X, y, lmbd, stats):
+        if self.warm_start and np.ndim(lmbd) > 0:
+            return True, "resumed runs are not supported on paths"
+        return False, None
+
+    def set_objective(self, X, y, lmbd, stats):
+        with phase('data_conversion'):
+            X = get_layout(X, self.X_layout)
+        self.X, self.y = X, y
+        # a single regularization value, or a path solved with warm starts
+        self.is_path = np.ndim(lmbd) > 0
+        self.lmbd_path = np.atleast_1d(lmbd)
 
         warnings.filterwarnings('ignore', category=ConvergenceWarning)
-        self.estimator = GeneralizedLinearEstimator(
-            datafit=Logistic(),
-            penalty=L1(lmbd / n_samples),
-            solver=ProxNewton(tol=1e-12, fit_intercept=False)
-        )
+        self._init_warm_start()
 
         # Perform 5 iteration of solver to cache Numba compilation
         # and avoid wiggly objective curves
-        self.run(5)
+        with phase('jit_warmup'):
+            self._run_iter(5)
 
-    def run(self, n_iter):
+    def _cold_start(self):
+        n_samples = self.X.shape[0]
+        self.estimator = GeneralizedLinearEstimator(
+            datafit=Logistic(),
+            penalty=L1(self.lmbd_path[0] / n_samples),
+            solver=ProxNewton(
+                tol=1e-12, fit_intercept=False,
+                warm_start=self.warm_start or self.is_path
+            )
+        )
+
+    def _run_iter(self, n_iter):
         self.estimator.solver.max_iter = n_iter
         self.estimator.fit(self.X, self.y)
         self.coef = self.estimator.coef_.flatten()
 
+    def run(self, n_iter):
+        if self.warm_start:
+            # n_iter is benchopt's callback, see WarmStartMixin
+            self._run_resumed(n_iter)
+            return
+
+        if not self.is_path:
+            self._run_iter(n_iter)
+            return
+
+        self._cold_start()
+        self.estimator.solver.max_iter = n_iter
+        n_samples = self.X.shape[0]
+        coefs = []
+        for lmbd in self.lmbd_path:
+            self.estimator.penalty = L1(lmbd / n_samples)
+            self.estimator.fit(self.X, self.y)
+            coefs.append(self.estimator.coef_.flatten())
+        self.coef = np.array(coefs)
+
     def get_next(self, stop_val):
         return stop_val + 1
 
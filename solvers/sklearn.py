@@ -1,18 +1,24 @@
 import warnings
 
 from benchopt import BaseSolver, safe_import_context
+from benchmark_utils.instrumentation import instrument, phase
 
 
 with safe_import_context() as import_ctx:
     from sklearn.exceptions import ConvergenceWarning
+    import numpy as np
     from sklearn.linear_model import LogisticRegression
+    from benchmark_utils.layouts import get_layout
 
 
+@instrument
 class Solver(BaseSolver):
     name = 'sklearn'
 
     install_cmd = 'conda'
     requirements = ['scikit-learn']
+    # liblinear works on CSR matrices
+    X_layout = 'row'
 
     parameters = {
         'solver': [
@@ -21,19 +27,46 @@ class Solver(BaseSolver):
     }
     parameter_template = "{solver}"
 
-    def set_objective(self, X, y, lmbd):
-        self.X, self.y, self.lmbd = X, y, lmbd
+    def skip(self, X, y, lmbd, stats):
+        if np.ndim(lmbd) > 0 and self.solver == 'liblinear':
+            # it would solve each problem of the path from scratch
+            return True, "liblinear cannot warm start along a path"
+        return False, None
+
+    def set_objective(self, X, y, lmbd, stats):
+        with phase('data_conversion'):
+            X = get_layout(X, self.X_layout)
+        self.X, self.y = X, y
+        # a single regularization value, or a path solved with warm starts
+        self.is_path = np.ndim(lmbd) > 0
+        self.lmbd_path = np.atleast_1d(lmbd)
 
         warnings.filterwarnings('ignore', category=ConvergenceWarning)
 
+        self._make_estimator()
+
+    def _make_estimator(self):
+        # saga samples the rows at random
         self.clf = LogisticRegression(
-            solver=self.solver, C=1 / self.lmbd,
-            penalty='l1', fit_intercept=False,
-            tol=1e-12)
+            solver=self.solver, C=1 / self.lmbd_path[0],
+            penalty='l1', fit_intercept=False, random_state=0,
+            tol=1e-12, warm_start=self.is_path)
 
     def run(self, n_iter):
+        if not self.is_path:
+            self.clf.max_iter = n_iter
+            self.clf.fit(self.X, self.y)
+            return
+
+        self._make_estimator()
         self.clf.max_iter = n_iter
-        self.clf.fit(self.X, self.y)
+        self.coefs = []
+        for lmbd in self.lmbd_path:
+            self.clf.C = 1 / lmbd
+            self.clf.fit(self.X, self.y)
+            self.coefs.append(self.clf.coef_.flatten())
 
     def get_result(self):
+        if self.is_path:
+            return dict(beta=np.array(self.coefs))
         return dict(beta=self.clf.coef_.flatten())
@@ -1,12 +1,15 @@
 from benchopt import BaseSolver, safe_import_context
-from benchopt.utils.sys_info import get_cuda_version
+from benchmark_utils.hardware import check_installed, get_cuda_version
+from benchmark_utils.instrumentation import instrument
 
 
 with safe_import_context() as import_ctx:
-    from snapml import LogisticRegression
     import numpy as np
+    # snapml is imported in set_objective
+    check_installed('snapml')
 
 
+@instrument
 class Solver(BaseSolver):
     name = "snapml"
 
@@ -15,12 +18,16 @@ class Solver(BaseSolver):
 
     parameters = {"gpu": [False, True]}
 
-    def skip(self, X, y, lmbd):
+    def skip(self, X, y, lmbd, stats):
         if self.gpu and get_cuda_version() is None:
             return True, "snapml[gpu=True] needs a GPU to run"
+        if np.ndim(lmbd) > 0:
+            return True, "regularization paths are not supported"
         return False, None
 
-    def set_objective(self, X, y, lmbd):
+    def set_objective(self, X, y, lmbd, stats):
+        from snapml import LogisticRegression
+
         self.X, self.y, self.lmbd = X, y, lmbd
 
         self.clf = LogisticRegression(
@@ -0,0 +1,212 @@
+from benchopt import BaseSolver
+from benchopt import safe_import_context
+from benchmark_utils.instrumentation import instrument, phase
+
+with safe_import_context() as import_ctx:
+    import math
+    import numpy as np
+    from scipy import sparse
+    from scipy.special import expit
+    from numba import njit
+    from benchmark_utils.layouts import get_layout, make_tiny_problem
+
+
+if import_ctx.failed_import:
+
+    def njit(*args, **kwargs):  # noqa: F811
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+
+@njit(cache=True)
+def st(x, mu):
+    if x > mu:
+        return x - mu
+    if x < - mu:
+        return x + mu
+    return 0.
+
+
+@njit(cache=True)
+def _lazy_prox(w_j, c, tau, n_steps):
+    """Apply n_steps times w_j <- st(w_j - c, tau), in closed form.
+
+    Between two samples using feature j, the gradient estimate of j is the
+    constant c / step: the skipped updates are applied when j is needed.
+    """
+    if n_steps == 0:
+        return w_j
+    # by symmetry, c >= 0: w_j decreases
+    sign = 1.
+    if c < 0:
+        sign, w_j, c = -1., -w_j, -c
+
+    if w_j > 0:
+        # steps keeping w_j positive, each decreasing it by c + tau
+        step = c + tau
+        if step == 0:
+            return sign * w_j
+        n_pos = min(n_steps, max(math.ceil(w_j / step) - 1, 0))
+        w_j -= n_pos * step
+        n_steps -= n_pos
+        if n_steps == 0:
+            return sign * w_j
+        # step to 0, or below
+        w_j = st(w_j - c, tau)
+        n_steps -= 1
+
+    # w_j <= 0: stuck at 0 if c <= tau, else decreasing by c - tau
+    if c <= tau:
+        return sign * min(w_j + n_steps * (tau - c), 0.)
+    return sign * (w_j - n_steps * (c - tau))
+
+
+@njit(cache=True)
+def _epoch(X_data, X_indices, X_indptr, y, w, memory, grad_mean,
+           last_update, samples, weights, step, tau, update_memory):
+    """Proximal steps of SAGA, or of SVRG when update_memory is False, on
+    the rows of samples.
+
+    memory[i] is the derivative of the loss of sample i at the point it was
+    last computed, and grad_mean the mean of the corresponding gradients.
+    Only the coordinates of the sampled row are updated: the other ones
+    are caught up with _lazy_prox when needed, last_update[j] being the
+    number of steps already applied to w[j].
+    """
+    n_samples = len(y)
+    for t in range(len(samples)):
+        i = samples[t]
+        start, end = X_indptr[i], X_indptr[i + 1]
+        x_i_w = 0.
+        for ind in range(start, end):
+            j = X_indices[ind]
+            w[j] = _lazy_prox(
+                w[j], step * grad_mean[j], tau, t - last_update[j])
+            last_update[j] = t
+            x_i_w += X_data[ind] * w[j]
+
+        deriv = -y[i] / (1 + math.exp(y[i] * x_i_w))
+        diff = deriv - memory[i]
+        for ind in range(start, end):
+            j = X_indices[ind]
+            grad_j = weights[i] * diff * X_data[ind] + grad_mean[j]
+            w[j] = st(w[j] - step * grad_j, tau)
+            last_update[j] = t + 1
+
+        if update_memory:
+            for ind in range(start, end):
+                grad_mean[X_indices[ind]] += diff * X_data[ind] / n_samples
+            memory[i] = deriv
+
+
+@njit(cache=True)
+def _catch_up(w, grad_mean, last_update, step, tau, n_steps):
+    """Apply the skipped updates, so that w is up to date after n_steps."""
+    for j in range(len(w)):
+        w[j] = _lazy_prox(
+            w[j], step * grad_mean[j], tau, n_steps - last_update[j])
+        last_update[j] = 0
+
+
+@instrument
+class Solver(BaseSolver):
+    """SAGA and prox-SVRG on CSR data, with just-in-time updates.
+
+    The problem is solved in its averaged form, mean of the losses plus
+    lmbd / n_samples times the L1 norm. Each step costs O(nnz(x_i)): the
+    updates of the coordinates outside of the sampled row, which only
+    depend on the mean gradient, are applied in closed form the next time
+    the coordinate is used.
+    """
+    name = "Stochastic"
+
+    install_cmd = 'conda'
+    requirements = ['numba']
+    # samples are rows of X
+    X_layout = 'row'
+
+    parameters = {
+        'algorithm': ['saga', 'svrg'],
+        # sample rows with probability proportional to their squared norm
+        'importance_sampling': [False, True],
+    }
+    references = [
+        'A. Defazio, F. Bach and S. Lacoste-Julien, "SAGA: A fast '
+        'incremental gradient method with support for non-strongly convex '
+        'composite objectives", NeurIPS (2014)',
+        'L. Xiao and T. Zhang, "A proximal stochastic gradient method with '
+        'progressive variance reduction", SIAM J. Optim. (2014)'
+    ]
+
+    def skip(self, X, y, lmbd, stats):
+        if not sparse.issparse(X):
+            return True, "just-in-time updates only pay off on sparse data"
+        if np.ndim(lmbd) > 0:
+            return True, "regularization paths are not supported"
+        return False, None
+
+    def set_objective(self, X, y, lmbd, stats):
+        with phase('data_conversion'):
+            self.X = get_layout(X, self.X_layout)
+        self.y, self.lmbd = y, lmbd
+        n_samples = X.shape[0]
+
+        # Lipschitz constants of the gradients of the losses of the samples
+        L = stats.squared_row_norms / 4
+        if self.importance_sampling:
+            # the losses reweighted by 1 / (n_samples * probas) all have
+            # the Lipschitz constant L.mean()
+            self.probas = L / L.sum()
+            self.weights = np.divide(
+                L.mean(), L, out=np.zeros(n_samples), where=L > 0)
+            self.step = 1 / (3 * L.mean())
+        else:
+            self.probas = None
+            self.weights = np.ones(n_samples)
+            self.step = 1 / (3 * L.max())
+        self.tau = self.step * lmbd / n_samples
+
+        with phase('jit_warmup'):
+            self._warm_up()
+
+    def _warm_up(self):
+        """Compile the kernels on a tiny problem like (X, y)."""
+        X, y = make_tiny_problem(self.X, self.y)
+        n_samples, n_features = X.shape
+        w, grad_mean = np.zeros(n_features), np.zeros(n_features)
+        last_update = np.zeros(n_features, dtype=np.int64)
+        _epoch(X.data, X.indices, X.indptr, y, w, np.zeros(n_samples),
+               grad_mean, last_update, np.arange(n_samples),
+               np.ones(n_samples), 1., 1., True)
+        _catch_up(w, grad_mean, last_update, 1., 1., n_samples)
+
+    def _get_derivatives(self, w):
+        # derivatives of the losses of the samples wrt x_i @ w, and the mean
+        # of the gradients
+        memory = -self.y * expit(-self.y * (self.X @ w))
+        return memory, self.X.T @ memory / len(self.y)
+
+    def run(self, n_iter):
+        X, y = self.X, self.y
+        n_samples, n_features = X.shape
+        rng = np.random.default_rng(0)
+
+        self.w = np.zeros(n_features)
+        last_update = np.zeros(n_features, dtype=np.int64)
+        if self.algorithm == 'saga':
+            memory, grad_mean = self._get_derivatives(self.w)
+
+        for _ in range(n_iter):
+            if self.algorithm == 'svrg':
+                # new snapshot, memory and grad_mean are fixed in the epoch
+                memory, grad_mean = self._get_derivatives(self.w)
+            samples = rng.choice(n_samples, size=n_samples, p=self.probas)
+            _epoch(X.data, X.indices, X.indptr, y, self.w, memory,
+                   grad_mean, last_update, samples, self.weights, self.step,
+                   self.tau, self.algorithm == 'saga')
+            _catch_up(self.w, grad_mean, last_update, self.step, self.tau,
+                      n_samples)
+
+    def get_result(self):
+        return dict(beta=self.w)
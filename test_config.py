@@ -1,7 +1,33 @@
 import sys  # noqa: F401
+import itertools
 import pytest  # noqa: F401
 
-from benchopt.utils.sys_info import get_cuda_version
+from benchmark_utils.hardware import get_cuda_version
+from benchmark_utils.warm_start import check_resumed_trajectory
+
+
+# Iteration counts at which resumed and cold runs are compared, and
+# tolerances on the objective for the solvers which resume exactly, and
+# for the other ones, see WarmStartMixin.exact_resume.
+WARM_START_N_ITERS = [1, 2, 5, 10]
+WARM_START_RTOL = {True: 1e-6, False: 1e-2}
+# Solvers which are run to convergence on a small sparse problem, for all
+# their parameters, with their number of iterations. The duality gap must
+# then be below CONVERGENCE_RTOL times the objective.
+CONVERGENCE_N_ITER = {'Stochastic': 1000}
+CONVERGENCE_RTOL = 1e-4
+
+
+def _get_simulated_objective(benchmark, **params):
+    """Return the objective set with a small Simulated dataset."""
+    dataset_class, = [
+        d for d in benchmark.get_datasets() if d.name == "Simulated"
+    ]
+    dataset = dataset_class.get_instance(
+        n_samples=50, n_features=20, **params)
+    objective = benchmark.get_benchmark_objective().get_instance(reg=.1)
+    objective.set_data(**dataset.get_data())
+    return objective
 
 
 def check_test_solver_install(solver_class):
@@ -20,3 +46,45 @@ def check_test_solver_install(solver_class):
     if "snapml" in solver_class.name.lower():
         if sys.platform == "darwin":
             pytest.xfail("SNAPML segfaults on MacOS.")
+
+
+def check_test_solver_run(benchmark, solver_class):
+    """Hook called in `test_solver_run`.
+
+    The solvers of CONVERGENCE_N_ITER are checked to converge. Solvers with
+    a warm_start parameter are also run with warm start on a small
+    simulated problem, and the resumed trajectory is compared with cold
+    runs.
+    """
+    if not solver_class.is_installed():
+        return
+    if solver_class.name in CONVERGENCE_N_ITER:
+        _check_convergence(benchmark, solver_class)
+    if 'warm_start' not in solver_class.parameters:
+        return
+
+    objective = _get_simulated_objective(benchmark)
+    solver = solver_class.get_instance(warm_start=True)
+    skip, _ = solver.skip(**objective.get_objective())
+    if skip:
+        return
+    solver.set_objective(**objective.get_objective())
+    exact = solver_class.exact_resume
+    check_resumed_trajectory(
+        solver, lambda result: objective.evaluate_result(**result)['value'],
+        WARM_START_N_ITERS, rtol=WARM_START_RTOL[exact], exact=exact
+    )
+
+
+def _check_convergence(benchmark, solver_class):
+    objective = _get_simulated_objective(benchmark, density=.2)
+    names = list(solver_class.parameters)
+    for values in itertools.product(*solver_class.parameters.values()):
+        solver = solver_class.get_instance(**dict(zip(names, values)))
+        solver.set_objective(**objective.get_objective())
+        solver.run(CONVERGENCE_N_ITER[solver_class.name])
+        result = objective.evaluate_result(**solver.get_result())
+        assert result['duality_gap'] <= CONVERGENCE_RTOL * result['value'], (
+            f"{solver} did not converge: duality gap "
+            f"{result['duality_gap']} for an objective {result['value']}."
+        )